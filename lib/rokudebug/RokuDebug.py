@@ -106,6 +106,8 @@ SIGHUP_LITERAL = 'SIGHUP'
 SIGINT_LITERAL = 'SIGINT'
 SIGTERM_LITERAL = 'SIGTERM'
 
+CLI_SHUTDOWN_TIMEOUT_SECONDS = 30
+
 _rokudebug_main = None
 
 # Validated set of options from the command line
@@ -250,17 +252,37 @@ class RokuDebug(object):
         # signals to this initial/main thread.
         if self.__check_debug(3):
             print('debug:main: main() idling...')
-        with self._exit_cond_var:
-            while not self._exit_now:
+        while True:
+            with self._exit_cond_var:
+                if self._exit_now:
+                    break
                 # As a backup, poll periodically without a cond_var
                 # notification.
                 self._exit_cond_var.wait(5)
+            self.__check_listener_error()
 
         if self.__check_debug(2):
             print('debug: main thread exits')
         do_exit(0)
     # END main_impl()
 
+    # Threads that send data to, or receive data from, the debuggee do not
+    # exit the process when they fail, they queue the error and wake this
+    # (main) thread.
+    # Does not return if an error was queued.
+    def __check_listener_error(self):
+        dclient = self.__debugger_client
+        err = dclient.get_listener_error() if dclient else None
+        if not err:
+            return
+        exception, traceback_str = err
+        if traceback_str:
+            print(traceback_str, file=sys.stderr, end='')
+            do_exit(1, 'INTERNAL ERR: uncaught exception')
+        if exception:
+            do_exit(1, str(exception))
+        do_exit(1, 'INTERNAL ERROR: unexpected termination of control listener')
+
     # Invoked with --no-execute to validate files in self.options
     # Exits script, never returns
     def __validate_files_and_exit(self):
@@ -896,6 +918,7 @@ class RokuDebug(object):
     # Blocks until all daemon threads have exited
     def __shutdown_impl(self):
         wait_for_cli_shutdown = False
+        cli = None
         with self.__lifecycle_lock:
             if self.__is_shut_down:
                 return
@@ -906,9 +929,10 @@ class RokuDebug(object):
 
             # Shut down user interface
             if self.__cli:
-                self.__cli.shutdown_async()
+                cli = self.__cli
+                cli.shutdown_async()
                 self.__cli = None
-                wait_for_cli_shutdown = True
+                wait_for_cli_shutdown = self.__is_cli_running
 
             # Shut down the connection to the debug target
             # Close the debugger client explicitly, in case the user
@@ -918,9 +942,9 @@ class RokuDebug(object):
                 self.__debugger_client = None
 
         if wait_for_cli_shutdown:
-            with self.__lifecycle_cond_var:
-                while self.__is_cli_running:
-                    self.__lifecycle_cond_var.wait(1.0)
+            if not cli.wait_until_interact_done(CLI_SHUTDOWN_TIMEOUT_SECONDS):
+                if self.__check_debug(1):
+                    print('debug: RokuDebug: timed out waiting for cli shutdown')
 
         with self.__lifecycle_lock:
             # Clean up tmp files and whatnot
@@ -1164,3 +1188,12 @@ def is_exiting() -> bool:
             condition.release()
             locked = False
 global_config.get_is_exiting = is_exiting
+
+# Wake the main thread, which is otherwise idle, to check for errors
+# queued by other threads. May be called from any thread.
+def wake_main_thread() -> None:
+    global _rokudebug_main
+    condition = _rokudebug_main._exit_cond_var
+    with condition:
+        condition.notify_all()
+global_config.wake_main_thread = wake_main_thread
@@ -51,6 +51,8 @@ class CommandLineCompleter(object):
 
     def __init__(self, cli):
         self.__debug_level = 0
+        self.__effective_debug_level = max(global_config.debug_level,
+                                           self.__debug_level)
         self.__lock = threading.Lock()
         self.__cli = cli
         self.__completion_domain = CompletionDomain.COMMAND_LINE
@@ -160,5 +162,4 @@ class CommandLineCompleter(object):
         return extraps
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self.__debug_level)
-        return lvl >= min_level
+        return self.__effective_debug_level >= min_level
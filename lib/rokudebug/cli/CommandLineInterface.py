@@ -29,7 +29,7 @@
 # it difficult (but not impossible) for other classes to access
 # those identifiers.
 
-import copy, enum, re, sys, queue, threading, time, traceback
+import bisect, copy, enum, functools, linecache, re, sys, queue, threading, time, traceback, types
 
 from rokudebug.model import Breakpoint
 from rokudebug.model import BreakpointManager
@@ -83,9 +83,22 @@ class _TargetState(enum.IntEnum):
     STEPPING = 3,
     TERMINATED = 4,
 
+# Target state names, as shown in the status line
+_TARGET_STATE_STRS = {state: state.name.lower() for state in _TargetState}
+
+# Kinds of events received by interact(), from other threads
+@enum.unique
+class _EventKind(enum.IntEnum):
+    USER_INPUT = 1,         # payload: str command line
+    DEBUGGER_UPDATE = 2,    # payload: DebuggerUpdate
+    SHUTDOWN = 3,           # payload: None
+
 _COMMAND_PROMPT = 'RRDB> '
 _BS_PROMPT = 'BrightScript> '
 
+_VAR_NAME_WIDTH_DEFAULT = 16
+_VAR_FMT_DEFAULT = '{{}}{{:{}s}} {{}}'.format(_VAR_NAME_WIDTH_DEFAULT)
+
 _THREAD_HDR_FMT = '{:<2s}   {:<40s}{}'
 _THREAD_LINE_FMT = '{:2d}{:1s} {:<40s} {}'
 
@@ -94,6 +107,19 @@ _LITERAL_THREAD_INDEX = 'thread_index'
 
 _NO_CONN_PROTOCOL_VERSION = ProtocolVersion(3,2,0)  # Used if not connected to a target
 
+# On some platforms (e.g., Windows 10), a signal (e.g., ^C) will not
+# interrupt a wait(), so interact() must wake up periodically there.
+_WAIT_MUST_POLL_FOR_SIGNALS = sys.platform.startswith('win')
+_WAIT_POLL_INTERVAL_SECONDS = 1.0
+
+# Max events processed by one pass of interact()'s loop, so that a burst
+# of updates from the target does not hold off test and shutdown checks.
+_MAX_EVENTS_PER_PASS = 50
+
+# Nothing calls task_done() or join() on the event queue, so use the
+# lighter SimpleQueue where it exists (python 3.7+)
+_EventQueue = getattr(queue, 'SimpleQueue', queue.Queue)
+
 # We add a dict to caller_data for requests, that only this module
 # accesses. These are the keys in that dict.
 @enum.unique
@@ -106,6 +132,19 @@ class CallerKey(enum.IntEnum):
     STOPPING                = 5,
     THREAD_ATTACHED         = 6,
 
+# Read-only caller_data for requests that only need to be identified
+# by their key. These are shared by all requests of each kind.
+# caller_data is never modified after a request is created, so a
+# chain of requests (e.g., threads -> stacktrace -> variables while
+# stopping) passes the same caller_data along without copying it.
+_CALLER_DATA_BACKTRACE = types.MappingProxyType({CallerKey.BACKTRACE: True})
+_CALLER_DATA_LISTING_FUNCTION = \
+    types.MappingProxyType({CallerKey.LISTING_FUNCTION: True})
+_CALLER_DATA_LISTING_THREADS = \
+    types.MappingProxyType({CallerKey.LISTING_THREADS: True})
+_CALLER_DATA_SELECTING_THREAD = \
+    types.MappingProxyType({CallerKey.SELECTING_THREAD: True})
+
 # A hint presented to the user with a display count
 # @param text text to display to user
 # @param display_limit max number of times to display the hint
@@ -265,10 +304,10 @@ class _CmdSpec(object):
 
     # get string for display to the user
     def get_display_str(self, include_example_args=False):
-        s = self.cmd_str
-        if self.short_aliases and len(self.short_aliases):
-            for alias in self.short_aliases:
-                s = s + '|' + alias
+        if self.short_aliases:
+            s = '|'.join((self.cmd_str, *self.short_aliases))
+        else:
+            s = self.cmd_str
         if include_example_args and self.example_args:
             s += ' {}'.format(self.example_args)
         return s
@@ -286,6 +325,159 @@ class _CmdSpecSeparator(_CmdSpec):
         self.is_active = False
 
 
+# Declarative command tables, bound to a CommandLineInterface by
+# __bind_cmd_specs(). Each entry is either:
+#   (cmd_str, is_visible, sort_order, handler_name, kwargs)
+# where handler_name is the name of a __handle_cmd_*() method without
+# the leading underscores (None for informational lines), or a tuple
+# (handler_name, handler_kwargs) to bind additional keyword arguments
+# to the handler, and kwargs are passed to _CmdSpec(), or:
+#   (separator_label, sort_order)
+
+# test command is invisible, because it is handled separately in help output
+_CMDS_TEST = (
+    ('test', False, 999, 'handle_cmd_test', dict(
+        example_args='<test-name>',
+        args_are_optional=False,
+        short_desc='Run test by name',
+        long_help='Run a test by name. While the test is running, no\n'
+            'command line input will be accepted.')),
+)
+
+# Default 1.0 commands
+_CMDS_1_0 = (
+
+    # General commands
+
+    ('General', 100),
+    # First line for 'help' is to provide info, function is noop
+    ('help', True, 110, None, dict(
+        short_desc='Print this help',
+        is_active=False)),
+    # Second line of info for help is the real deal
+    ('help', True, 111, 'handle_cmd_help', dict(
+        example_args='<command>',
+        args_are_optional=True,
+        short_desc='Print help for a command',
+        show_args_in_short_help=True,
+        is_active=True)),
+    ('quit', True, 120, 'handle_cmd_quit', dict(
+        short_desc='Quit debugger and terminate target')),
+    ('status', True, 130, 'handle_cmd_status', dict(
+        short_desc='Show debugger status')),
+
+    # Execution commands
+
+    ('Execution', 200),
+    ('continue', True, 210, 'handle_cmd_continue', dict(
+        short_desc='Continue all threads')),
+    ('stop', True, 220, 'handle_cmd_stop', dict(
+        short_desc='Stop all threads',
+        requires_connection=True)),
+
+    # Inspection commands
+
+    ('Inspection', 400),
+    ('backtrace', True, 410, 'handle_cmd_backtrace', dict(
+        short_aliases=['bt'],
+        short_desc='Print stack backtrace of selected thread')),
+    ('down', True, 420, 'handle_cmd_down', dict(
+        short_aliases=['d'],
+        short_desc='Move one frame down the function call stack')),
+    ('list', True, 430, 'handle_cmd_list', dict(
+        short_desc='List current function')),
+    ('show', True, 440, 'handle_cmd_show', dict( # was _print
+        example_args='<variable-name-or-path>',
+        short_desc='Print a variable\'s value')),
+    ('thread', True, 450, 'handle_cmd_thread', dict(
+        short_aliases=['th'],
+        example_args='<threadid>',
+        short_desc='Select a thread for inspection')),
+    ('threads', True, 460, 'handle_cmd_threads', dict(
+        short_aliases=['ths'],
+        short_desc='Show all threads')),
+    ('up', True, 470, 'handle_cmd_up', dict(
+        short_aliases=['u'],
+        short_desc='Move one frame up the function call stack')),
+    ('vars', True, 480, 'handle_cmd_vars', dict(
+        short_desc='Show variables in the current scope')),
+)
+
+# VERSION-DEPENDENT COMMANDS
+
+_CMDS_STEP = (
+    ('over', True, 230, ('handle_cmd_step_any', dict(step_type=StepType.OVER)), dict(
+        short_aliases=['v'],
+        short_desc='Step over one program statement')),
+    ('out', True, 240, ('handle_cmd_step_any', dict(step_type=StepType.OUT)), dict(
+        short_aliases=['o'],
+        short_desc='Step out of the current function')),
+    ('step', True, 250, ('handle_cmd_step_any', dict(step_type=StepType.LINE)), dict(
+        short_aliases=['s','t'],
+        short_desc='Step one program statement')),
+    ('killio', True, 260, 'handle_cmd_disconnect_io', dict(
+        short_aliases=[],
+        short_desc='Disconnect io console')),
+)
+
+_CMDS_BREAKPOINTS = (
+    ('Breakpoints', 300),
+    ('addbreak', True, 310, 'handle_cmd_add_breakpoint', dict(
+        args_are_optional=True,
+        short_aliases=['break','ab'],
+        example_args='<filename:linenum> [ignore_count] | <no args for interactive>',
+        short_desc='Set a breakpoint',
+        long_help='Add a breakpoint at a given file name and'
+                    ' line number, with an optional'
+                    ' ignore_count.\n'
+                    'Examples:\n'
+                    '    addbreak\n'
+                    '    addbreak main.brs:25\n'
+                    '    addbreak main.brs:25 99\n'
+                    '    addbreak main.brs:25 99 x = 5')),
+    ('rmbreaks', True, 320, 'handle_cmd_remove_breakpoints', dict(
+        short_aliases=['rb'],
+        example_args='<breakpointid> [<breakpointid>...]',
+        short_desc='Clear (remove) breakpoints by ID'
+                    ', or * to clear all')),
+    #('disablebreak', True, 330, 'handle_cmd_disable_breakpoint', dict(
+    #    short_aliases=['db'],
+    #    short_desc='Disable breakpoints by ID or *')),
+    #('enablebreak', True, 340, 'handle_cmd_enable_breakpoint', dict(
+    #    short_aliases=['eb'],
+    #    short_desc='Disable breakpoints by ID or *')),
+    ('listbreaks', True, 350, 'handle_cmd_list_breakpoints', dict(
+        short_aliases=['lb'],
+        short_desc='List all breakpoints')),
+)
+
+_CMDS_EXECUTE = (
+    # bs = switch mode between commands and BrightScript
+    # long_help is set from _BS_LONG_HELP_FMT when bound
+    ('bs', True, 105, 'handle_cmd_bs', dict(
+        short_aliases=['.'],
+        short_desc='Execute BrightScript statement, or enter interpreter',
+        example_args="<BrightScript statement> | <no args for interactive>",
+        args_are_optional=True)),
+)
+
+# {} is replaced by the hint for exiting the interpreter
+_BS_LONG_HELP_FMT = ('Examples:\n'
+    '-----------------------------------------\n'
+    + _COMMAND_PROMPT + 'bs x = 5\n'
+    '-----------------------------------------\n'
+    + _COMMAND_PROMPT + '. x = 5\n'
+    '-----------------------------------------\n'
+    + _COMMAND_PROMPT + '.\n'
+    '{}\n'
+    + _BS_PROMPT + 'x = 5\n'
+    + _BS_PROMPT + 'print x\n'
+    '5\n'
+    + _BS_PROMPT + '.\n'
+    + _COMMAND_PROMPT + '\n'
+    '-----------------------------------------')
+
+
 # Command-line interface, to handle all user requests
 # All output from the target is sent to the target_output_controller
 # @param target_output_controller must have two file-like attrs:
@@ -299,6 +491,10 @@ class CommandLineInterface(object):
             target_output_controller, stop_target_on_launch,
             test_mgr, debug_preserve_breakpoint_path):
         self._debug_level = 0
+        # The global debug level is set when the command line is parsed,
+        # before this object is created, so it is resolved once, here.
+        self.__debug_level = max(global_config.debug_level, self._debug_level)
+        assert global_config.debug_level >= 0 and self._debug_level >= 0
 
         self.__test_mgr = test_mgr
         self.__tests_are_autorun = False
@@ -311,21 +507,27 @@ class CommandLineInterface(object):
         self.__channel_zip_file_path = channel_zip_file_path
         self.__lib_sources = lib_sources
         self.__protocol_version = _NO_CONN_PROTOCOL_VERSION
+        self.__has_bad_line_number_bug = False  # set in interact()
         self.__in_file = sys.stdin
         self.__out_file = sys.stdout
+        self.__out_write = self.__out_file.write    # never re-assigned
         self.__target_output_controller = target_output_controller
         self.__prev_cmd_failed = True   # Add hint to first prompt
 
         # guard primarily for asynchronous shutdown requests
         self.__self_state_lock = threading.Lock()
         self.__is_handling_update = False
+        self.__is_stopping = False      # True until a stop's crash dump is printed
         self.__is_interacting = False
         self.__is_shut_down = False
+        self.__interact_done = threading.Event()    # set when interact() returns
 
         self.__cmd_mode = _CommandMode.COMMANDS
         self.__target_state = _TargetState.UNKNOWN # use accessor methods
         self.__target_state_lock = threading.Lock()
         self.__threads = None          # DebuggerReponse_Threads.ThreadInfo
+        self.__threads_epoch = 0       # incremented when threads/selection change
+        self.__threads_str_cache = None  # (epoch, str), see __print_threads()
 
         # "sel" = selected
         self.__sel_thread_index = None          # Index of selected thread
@@ -335,18 +537,47 @@ class CommandLineInterface(object):
 
         self.__breakpoints = BreakpointManager()
 
+        # Handlers for updates, by UpdateType (asynchronous updates)
+        # and by the request's CmdCode (UpdateType.COMMAND_RESPONSE)
+        self.__update_handlers = {
+            UpdateType.ALL_THREADS_STOPPED: self.__handle_update_all_threads_stopped,
+            UpdateType.BREAKPOINT_ERROR: self.__handle_update_breakpoint_error,
+            UpdateType.COMPILE_ERROR: self.__handle_update_compile_error,
+            UpdateType.THREAD_ATTACHED: self.__handle_update_thread_attached,
+            UpdateType.BREAKPOINT_VERIFIED: self.__handle_update_breakpoint_verified,
+            UpdateType.PROTOCOL_ERROR: self.__handle_update_protocol_error,
+        }
+        self.__response_handlers = {
+            CmdCode.ADD_BREAKPOINTS: self.__handle_update_add_breakpoints,
+            CmdCode.ADD_CONDITIONAL_BREAKPOINTS: self.__handle_update_add_breakpoints,
+            CmdCode.CONTINUE: self.__handle_update_continue_response,
+            CmdCode.EXECUTE: self.__handle_update_execute,
+            CmdCode.EXIT_CHANNEL: self.__handle_update_exit_channel,
+            CmdCode.LIST_BREAKPOINTS: self.__handle_update_list_breakpoints,
+            CmdCode.REMOVE_BREAKPOINTS: self.__handle_update_remove_breakpoints,
+            CmdCode.STACKTRACE: self.__handle_update_stack_trace,
+            CmdCode.STEP: self.__handle_update_step_response,
+            CmdCode.STOP: self.__handle_update_stop_response,
+            CmdCode.THREADS: self.__handle_update_threads,
+            CmdCode.VARIABLES: self.__handle_update_variables,
+        }
+
         # protected
         self._src_inspector = SourceCodeInspector(
             self.__channel_zip_file_path, self.__lib_sources)
 
         # private
-        self.__input_cond_var = threading.Condition()  # notified on user or debugger event
-        self.__user_input_queue = queue.Queue()        # Queue is thread-safe
-        self.__debugger_update_queue = queue.Queue()   # Queue is thread-safe
+        self.__events = _EventQueue()   # (_EventKind, payload), thread-safe
         self.__shutdown_trigger = False             # Latched to True to shut down
         self.__debug_preserve_breakpoint_path = debug_preserve_breakpoint_path
 
-        self.__all_cmds = None  # set in interact()
+        self.__all_cmds = None  # tuple of _CmdSpec, set in interact()
+        self.__cmd_match_cache = dict() # prefix -> (_CmdSpec|None, err_msg|None)
+        self.__exact_cmds = None        # cmd_str or alias -> _CmdSpec
+        self.__abbrev_cmd_strs = None   # sorted list of str cmd_str
+        self.__abbrev_cmds = None       # _CmdSpec(s), parallel to above
+        self.__cmd_help_text = None     # str, general help for all commands
+        self.__cmd_help_indent_str = None   # str, indent for help separators
 
         self.__hint_bs_to_exit_interpreter = _Hint('"bs" or "." to exit BrightScript interpreter')
         self.__hint_bs_to_run_bs = _Hint('"bs" or "." to execute BrightScript (see "help bs")')
@@ -366,6 +597,12 @@ class CommandLineInterface(object):
     # Start the command line, with or without a channel already running
     # @param debugger_client may be None if no channel has been installed
     def interact(self, app_installer, debugger_client):
+        try:
+            self.__interact_impl(app_installer, debugger_client)
+        finally:
+            self.__interact_done.set()
+
+    def __interact_impl(self, app_installer, debugger_client):
         if self.__check_debug(2):
             print('debug: cli: interact() -- start')
         self.__app_installer = app_installer
@@ -374,13 +611,17 @@ class CommandLineInterface(object):
         self.__debugger_client = debugger_client
         self.__test_or_debugger_client_changed()
         self.__protocol_version = debugger_client.protocol_version
+        self.__has_bad_line_number_bug = debugger_client.has_feature(
+                ProtocolFeature.BAD_LINE_NUMBER_IN_STACKTRACE_BUG)
 
         fin = self.__in_file
         fout = self.__out_file
         if self.__stop_target_on_launch:
             assert debugger_client.has_feature(
                             ProtocolFeature.STOP_ON_LAUNCH_ALWAYS)
-        self.__all_cmds = self.__build_cmd_spec_list()
+        self.__all_cmds = tuple(self.__build_cmd_spec_list())
+        self.__index_cmd_specs()
+        self.__build_cmd_help_text()
         assert self.__all_cmds and len(self.__all_cmds)
 
         with self.__self_state_lock:
@@ -410,6 +651,8 @@ class CommandLineInterface(object):
             self.__tests_are_autorun = False
 
         done = False
+        is_first_pass = True    # print the first prompt without waiting
+        is_prompting = False    # True if waiting for user input
         try:
             while not done:
 
@@ -422,19 +665,23 @@ class CommandLineInterface(object):
                 # REMIND: we should have a timeout on this, in case the device
                 #         is disconnected (or crashes)
                 ###########################################################
-                with self.__input_cond_var:
-                    dclient = self.__debugger_client
-                    if self.__shutdown_trigger:
-                        done = True
-                        break
-
-                    # On some platforms (e.g., Windows 10), a signal (e.g., ^C) will
-                    # not interrupt a wait(), so we limit wait time and poll here to
-                    # allow signal handling.
-                    # Additionally, if a test is running then debug target output needs to
-                    # be sent to that test occasionally. Currently, output from the target
-                    # does not cause a notification.
-                    self.__input_cond_var.wait(1.0)
+                events = list()
+                if is_first_pass:
+                    is_first_pass = False
+                else:
+                    # If a test is selected, debug target output needs to be
+                    # sent to that test occasionally. Currently, output from
+                    # the target does not cause an event.
+                    # If not prompting, the state that is blocking the prompt
+                    # (e.g., a pending request) may change without an event,
+                    # so it must be re-checked occasionally.
+                    timeout = None
+                    if _WAIT_MUST_POLL_FOR_SIGNALS or (not is_prompting) or \
+                            self.__test_mgr.get_current_test():
+                        timeout = _WAIT_POLL_INTERVAL_SECONDS
+                    try:
+                        events.append(self.__events.get(timeout=timeout))
+                    except queue.Empty: pass
 
                 ########################################################
                 # Update any test in progress
@@ -451,36 +698,43 @@ class CommandLineInterface(object):
                 del cur_test
 
                 #########################################################
-                # Process pending updates from target
+                # Process pending updates from target and user input
                 #########################################################
 
-                # queue.Queue is thread-safe. Nothing else is removing elements
-                # from the queues, so no additional synchronization is necessary.
-
-                # Process debugger updates first
-                while not done and not self.__debugger_update_queue.empty():
-                    with self.__self_state_lock:
-                        self.__is_handling_update = True
-                    self.__process_debugger_update(self.__debugger_update_queue.get())
-                    with self.__self_state_lock:
-                        self.__is_handling_update = False
-
-                ########################################################
-                # Process queued user input
-                ########################################################
-
-                # Process user input
-                while not done and not self.__user_input_queue.empty():
-                    if self.__shutdown_trigger:
+                # Events are processed in the order received. Nothing else
+                # is removing elements from the queue, so no additional
+                # synchronization is necessary. Any events beyond the
+                # limit for this pass are left for the next pass.
+                event_count = 0
+                while not done and event_count < _MAX_EVENTS_PER_PASS:
+                    event_count += 1
+                    if not len(events):
+                        try:
+                            events.append(self.__events.get_nowait())
+                        except queue.Empty:
+                            break
+                    (event_kind, payload) = events.pop()
+                    if self.__shutdown_trigger or \
+                            (event_kind == _EventKind.SHUTDOWN):
                         done = True
                         break
-                    self.__handle_cmd_line(self.__user_input_queue.get())
+                    if event_kind == _EventKind.DEBUGGER_UPDATE:
+                        with self.__self_state_lock:
+                            self.__is_handling_update = True
+                        self.__process_debugger_update(payload)
+                        with self.__self_state_lock:
+                            self.__is_handling_update = False
+                    else:
+                        self.__handle_cmd_line(payload)
+                if done:
+                    break
 
                 ##########################################################
                 # Accept user input
                 ##########################################################
 
-                if self.__prompt_for_user_input():
+                is_prompting = self.__prompt_for_user_input()
+                if is_prompting:
                     input_count = self.__input_processor.get_input_count()
                     prompts = list()
                     if self.__cmd_mode == _CommandMode.COMMANDS:
@@ -524,6 +778,7 @@ class CommandLineInterface(object):
 
         # Ignore exceptions during shutdown, because there is nothing
         # we can do about it.
+        self.__input_processor.shutdown()
         try:
             self.__send_final_channel_terminate_if_needed()
         except Exception:
@@ -549,9 +804,12 @@ class CommandLineInterface(object):
                 return False
             if self.__is_handling_update:
                 return False
+            if self.__is_stopping:
+                # Don't render a prompt partway through the stop sequence
+                return False
         if self.__debugger_client and self.__debugger_client.has_pending_request():
             return False
-        if not self.__debugger_update_queue.empty():
+        if not self.__events.empty():
             return False
         if self.__test_mgr.current_test_is_running():
             return False
@@ -614,15 +872,19 @@ class CommandLineInterface(object):
     # interact(). Shutdown is complete when interact() returns.
     # May be called from any thread
     def shutdown_async(self):
-        with self.__input_cond_var:
-            # lock ordering : 1)input_cond_var's lock, 2)__self_state_lock
-            with self.__self_state_lock:
-                if not self.__is_interacting:
-                    return
-            if (self.__check_debug(2)):
-                print('debug: cli: shutdown(): triggering shutdown')
-            self.__shutdown_trigger = True
-            self.__input_cond_var.notify_all()
+        with self.__self_state_lock:
+            if not self.__is_interacting:
+                return
+        if (self.__check_debug(2)):
+            print('debug: cli: shutdown(): triggering shutdown')
+        self.__shutdown_trigger = True
+        self.__events.put((_EventKind.SHUTDOWN, None))
+
+    # Blocks until interact() has returned, or timeout_seconds have elapsed
+    # May be called from any thread, except the one running interact()
+    # @return True if interact() has returned, False on timeout
+    def wait_until_interact_done(self, timeout_seconds=None):
+        return self.__interact_done.wait(timeout_seconds)
 
     def __has_tests(self):
         return self.__test_mgr and self.__test_mgr.count_tests()
@@ -682,6 +944,63 @@ class CommandLineInterface(object):
                     aliases.append((alias, cmd_spec.cmd_str))
         return aliases
 
+    # Format the general help for all commands, from self.__all_cmds.
+    # The command list does not change during a session, so this is
+    # done once, rather than every time help is printed.
+    def __build_cmd_help_text(self):
+        # Determine the proper column width(s)
+        cmd_width = 0
+        help_width = 0
+        for cmd_entry in self.__all_cmds:
+            if (not cmd_entry.is_visible) or (cmd_entry.is_separator):
+                continue
+            displayStr = cmd_entry.get_display_str(
+                                cmd_entry.show_args_in_short_help)
+            cmd_width = max(cmd_width, len(displayStr))
+            if (cmd_entry.short_desc):
+                help_width = max(help_width, len(cmd_entry.short_desc))
+        # total_width = min(80, cmd_width + help_width + 2) # approximate
+
+        indent_str = ' ' * int((cmd_width)/2)
+
+        # Format the help
+        out_parts = ['Roku Remote Debugger Help\n\n']
+        fmtStr = '{:' + str(cmd_width) + 's}  {}\n'
+        for cmd_entry in self.__all_cmds:
+            if not cmd_entry.is_visible:
+                continue
+            if cmd_entry.is_separator:
+                out_parts.append('{}----- {} -----\n'.format(
+                    indent_str, cmd_entry.cmd_str))
+            else:
+                out_parts.append(fmtStr.format(
+                        cmd_entry.get_display_str(
+                                        cmd_entry.show_args_in_short_help),
+                        cmd_entry.short_desc))
+        self.__cmd_help_text = ''.join(out_parts)
+        self.__cmd_help_indent_str = indent_str
+
+    # Build the indexes used by __match_command(), from self.__all_cmds
+    def __index_cmd_specs(self):
+        self.__cmd_match_cache = dict()
+        exact_cmds = dict()
+        abbrev_entries = list()
+        for cmd in self.__all_cmds:
+            if not cmd.is_active:
+                continue
+            # Short aliases always require an exact match
+            exact_cmds.setdefault(cmd.cmd_str, cmd)
+            if cmd.short_aliases:
+                for short_alias in cmd.short_aliases:
+                    exact_cmds.setdefault(short_alias, cmd)
+            # Undocumented commands cannot be abbreviated
+            if cmd.is_visible:
+                abbrev_entries.append((cmd.cmd_str, cmd))
+        abbrev_entries.sort(key=lambda entry : entry[0])
+        self.__exact_cmds = exact_cmds
+        self.__abbrev_cmd_strs = [entry[0] for entry in abbrev_entries]
+        self.__abbrev_cmds = [entry[1] for entry in abbrev_entries]
+
     def __build_cmd_spec_list(self):
         if self.__check_debug(2):
             print('debug: build_cmd_spec_list(),protocolver={}'.format(
@@ -709,174 +1028,58 @@ class CommandLineInterface(object):
         # Create list of commands
         ###############################################
         cmds = list()
-
-        # Default 1.0 commands
-
-        # _CmdSpec(cmd_str, is_visible, sort_order, func,
-        #           short_aliases=None, example_args=None, short_desc=None):
-
         if self.__has_tests():
-            # test command is invisible, because it is handled separately in help output
-            cmds.append(_CmdSpec('test', False, 999, self.__handle_cmd_test,
-                example_args='<test-name>',
-                args_are_optional=False,
-                short_desc='Run test by name',
-                long_help='Run a test by name. While the test is running, no\n'\
-                    'command line input will be accepted.'))
-
-        cmds.extend([
-
-            # General commands
-
-            _CmdSpecSeparator('General', 100),
-            # First line for 'help' is to provide info, function is noop
-            _CmdSpec('help', True, 110, noop_func,
-                    short_desc='Print this help',
-                    is_active=False),
-            # Second line of info for help is the real deal
-            _CmdSpec('help', True, 111, self.__handle_cmd_help,
-                    example_args='<command>',
-                    args_are_optional=True,
-                    short_desc='Print help for a command',
-                    show_args_in_short_help=True,
-                    is_active=True),
-            _CmdSpec('quit', True, 120, self.__handle_cmd_quit,
-                    short_desc='Quit debugger and terminate target'),
-            _CmdSpec('status', True, 130, self.__handle_cmd_status,
-                    short_desc='Show debugger status'),
-
-            # Execution commands
-
-            _CmdSpecSeparator('Execution', 200),
-            _CmdSpec('continue', True, 210, self.__handle_cmd_continue,
-                    short_desc='Continue all threads'),
-            _CmdSpec('stop', True, 220, self.__handle_cmd_stop,
-                    short_desc='Stop all threads',
-                    requires_connection=True),
-
-            # Inspection commands
-
-            _CmdSpecSeparator('Inspection', 400),
-            _CmdSpec('backtrace', True, 410, self.__handle_cmd_backtrace,
-                    short_aliases=['bt'],
-                    short_desc='Print stack backtrace of selected thread'),
-            _CmdSpec('down', True, 420, self.__handle_cmd_down,
-                    short_aliases=['d'],
-                    short_desc='Move one frame down the function call stack'),
-            _CmdSpec('list', True, 430, self.__handle_cmd_list,
-                    short_desc='List current function'),
-            _CmdSpec('show', True, 440, self.__handle_cmd_show, # was _print
-                    example_args='<variable-name-or-path>',
-                    short_desc='Print a variable\'s value'),
-            _CmdSpec('thread', True, 450, self.__handle_cmd_thread,
-                    short_aliases=['th'],
-                    example_args='<threadid>',
-                    short_desc='Select a thread for inspection'),
-            _CmdSpec('threads', True, 460, self.__handle_cmd_threads,
-                    short_aliases=['ths'],
-                    short_desc='Show all threads'),
-            _CmdSpec('up', True, 470, self.__handle_cmd_up,
-                    short_aliases=['u'],
-                    short_desc='Move one frame up the function call stack'),
-            _CmdSpec('vars', True, 480, self.__handle_cmd_vars,
-                    short_desc='Show variables in the current scope'),
-        ])
-
-        # VERSION-DEPENDENT COMMANDS
-        # _CmdSpec(cmd_str, is_visible, sort_order, function,
-        #           short_aliases=None, example_args=None, short_desc=None
-
+            cmds.extend(self.__bind_cmd_specs(_CMDS_TEST))
+        cmds.extend(self.__bind_cmd_specs(_CMDS_1_0))
         if has_step_commands:
-            cmds.extend([
-                _CmdSpec('over', True, 230, self.__handle_cmd_over,
-                        short_aliases=['v'],
-                        short_desc='Step over one program statement'),
-                _CmdSpec('out', True, 240, self.__handle_cmd_out,
-                        short_aliases=['o'],
-                        short_desc='Step out of the current function'),
-                _CmdSpec('step', True, 250, self.__handle_cmd_step,
-                        short_aliases=['s','t'],
-                        short_desc='Step one program statement'),
-                _CmdSpec('killio', True, 260, self.__handle_cmd_disconnect_io,
-                        short_aliases=[],
-                        short_desc='Disconnect io console'),
-            ])
-
+            cmds.extend(self.__bind_cmd_specs(_CMDS_STEP))
         if has_breakpoint_commands:
-            cmds.extend([
-                _CmdSpecSeparator("Breakpoints", 300),
-                _CmdSpec('addbreak', True, 310,
-                        self.__handle_cmd_add_breakpoint,
-                        args_are_optional=True,
-                        short_aliases=['break','ab'],
-                        example_args='<filename:linenum> [ignore_count] | <no args for interactive>',
-                        short_desc='Set a breakpoint',
-                        long_help='Add a breakpoint at a given file name and'
-                                    ' line number, with an optional'
-                                    ' ignore_count.\n'
-                                    'Examples:\n'
-                                    '    addbreak\n'
-                                    '    addbreak main.brs:25\n'
-                                    '    addbreak main.brs:25 99\n'
-                                    '    addbreak main.brs:25 99 x = 5'),
-                _CmdSpec('rmbreaks', True, 320,
-                        self.__handle_cmd_remove_breakpoints,
-                        short_aliases=['rb'],
-                        example_args='<breakpointid> [<breakpointid>...]',
-                        short_desc='Clear (remove) breakpoints by ID'
-                                    ', or * to clear all'),
-                #_CmdSpec('disablebreak', True, 330,
-                #        self.__handle_cmd_disable_breakpoint,
-                #        short_aliases=['db'],
-                #        short_desc='Disable breakpoints by ID or *'),
-                #_CmdSpec('enablebreak', True, 340,
-                #        self.__handle_cmd_enable_breakpoint,
-                #        short_aliases=['eb'],
-                #        short_desc='Disable breakpoints by ID or *'),
-                _CmdSpec('listbreaks', True, 350,
-                        self.__handle_cmd_list_breakpoints,
-                        short_aliases=['lb'],
-                        short_desc='List all breakpoints'),
-            ])
-
+            cmds.extend(self.__bind_cmd_specs(_CMDS_BREAKPOINTS))
         if has_execute_command:
-                cmds.extend([
-					# bs = switch mode between commands and BrightScript
-                    _CmdSpec('bs', True, 105, self.__handle_cmd_bs,
-                        short_aliases=['.'],
-                        short_desc='Execute BrightScript statement, or enter interpreter',
-                        example_args="<BrightScript statement> | <no args for interactive>",
-                        args_are_optional=True,
-                        long_help='Examples:\n'
-                            '-----------------------------------------\n'
-                            + _COMMAND_PROMPT + 'bs x = 5\n'
-                            '-----------------------------------------\n'
-                            + _COMMAND_PROMPT + '. x = 5\n'
-                            '-----------------------------------------\n'
-                            + _COMMAND_PROMPT + '.\n'
-                            + self.__hint_bs_to_exit_interpreter.get_text() + '\n'
-                            + _BS_PROMPT + 'x = 5\n'
-                            + _BS_PROMPT + 'print x\n'
-                            '5\n'
-                            + _BS_PROMPT + '.\n'
-                            + _COMMAND_PROMPT + '\n'
-                            '-----------------------------------------')
-                ])
+            exec_cmds = self.__bind_cmd_specs(_CMDS_EXECUTE)
+            for cmd in exec_cmds:
+                if cmd.cmd_str == 'bs':
+                    cmd.long_help = _BS_LONG_HELP_FMT.format(
+                        self.__hint_bs_to_exit_interpreter.get_text())
+            cmds.extend(exec_cmds)
 
         # sort the whole kit and kaboodle
         cmds.sort(key=lambda cmd : cmd.sort_order)
         return cmds
 
+    # Convert a declarative command table (see _CMDS_1_0) to a list
+    # of _CmdSpec, with handlers bound to this object.
+    # @return list of _CmdSpec
+    def __bind_cmd_specs(self, cmd_table):
+        cmds = list()
+        for entry in cmd_table:
+            if len(entry) == 2:
+                cmds.append(_CmdSpecSeparator(*entry))
+                continue
+            cmd_str, is_visible, sort_order, handler_name, kwargs = entry
+            handler_kwargs = None
+            if isinstance(handler_name, tuple):
+                handler_name, handler_kwargs = handler_name
+            if handler_name:
+                func = getattr(self, '_CommandLineInterface__' + handler_name)
+            else:
+                func = noop_func
+            if handler_kwargs:
+                func = functools.partial(func, **handler_kwargs)
+            cmds.append(_CmdSpec(cmd_str, is_visible, sort_order, func,
+                                 **kwargs))
+        return cmds
+
     # Invoked on a random thread for various reasons, such
     # as a ^C which sends a stop command
     def __queue_cmd(self, cmdStr):
         if self.__check_debug(2):
             print('debug: __queue_cmd({})'.format(cmdStr))
         with self.__self_state_lock:
-            if self.__is_interacting:
-                    self.__user_input_queue.put(cmdStr)
-            with self.__input_cond_var:
-                self.__input_cond_var.notify_all()
+            is_interacting = self.__is_interacting
+        # The queue has its own lock, so do not hold ours while putting
+        if is_interacting:
+            self.__events.put((_EventKind.USER_INPUT, cmdStr))
 
     # Prints the one-time intro message
     def __print_intro(self):
@@ -908,15 +1111,17 @@ class CommandLineInterface(object):
         prev_thread_index = self.__sel_thread_index
         prev_stack_index = self.__sel_thread_stack_index
 
-        if not stack_index:
+        if stack_index is None:    # 0 is valid
             num_frames = 0
-            if self.__sel_thread_stack_info:
-                num_frames = self.__sel_thread_stack_info.get_num_frames()
+            stack_info = self.__sel_thread_stack_info
+            if stack_info is not None:
+                num_frames = stack_info.get_num_frames()
             if num_frames:
                 stack_index = num_frames - 1
 
         self.__sel_thread_index = thread_index
         self.__sel_thread_stack_index = stack_index
+        self.__threads_epoch += 1
 
         # Clear out any obsolete stored data
         need_new_stack_trace = False
@@ -930,8 +1135,9 @@ class CommandLineInterface(object):
             self.__sel_thread_vars = None
 
         if need_new_stack_trace:
-            cmd_caller_data = {CallerKey.SELECTING_THREAD:True}
+            cmd_caller_data = _CALLER_DATA_SELECTING_THREAD
             if caller_data:
+                cmd_caller_data = dict(cmd_caller_data)
                 cmd_caller_data.update(caller_data)
             cmd = DebuggerRequest_Stacktrace(
                 self.__sel_thread_index, cmd_caller_data)
@@ -950,6 +1156,7 @@ class CommandLineInterface(object):
     # NB: "sel" = "selected"
     def __reset_sel_thread(self, new_thread_index=None):
         self.__sel_thread_index = new_thread_index
+        self.__threads_epoch += 1
         self.__sel_thread_stack_index = None
         self.__sel_thread_stack_info = None
         self.__sel_thread_vars = None
@@ -982,20 +1189,19 @@ class CommandLineInterface(object):
         lines = self._src_inspector.get_source_lines(
                                         file_path, line_start, line_end)
 
-        # Mark all Program Counters in the call stack
-        tail_pc_line_num = stack_frames[len(stack_frames)-1].line_num
-        pc_line_nums = set([tail_pc_line_num])
-        for i_frame in range(len(stack_frames)):
-            one_frame = stack_frames[i_frame]
-            if one_frame.file_path == sel_frame.file_path:
-                pc_line_nums.add(one_frame.line_num)
+        # Mark all Program Counters in the call stack, in this file
+        tail_pc_line_num = stack_frames[-1].line_num
+        pc_line_nums = frozenset(one_frame.line_num
+            for one_frame in stack_frames if one_frame.file_path == file_path)
 
-        if not (lines and len(lines)):
+        if not lines:
             print('Could not find source lines: {}:{}-{}'.format(
                 file_path, line_start, line_end),
                 file=fout)
         else:
-            print('Current Function:', file=fout)
+            # Written all at once, rather than line-by-line
+            out_parts = ['Current Function:\n']
+            brk_mgr = self.__breakpoints
             for line in lines:
                 pc_token = ' '
                 breakpoint_token = ' '
@@ -1008,18 +1214,16 @@ class CommandLineInterface(object):
                             is_error_line = True
                     else:
                         pc_token = '>'
-                brk_mgr = self.__breakpoints
                 if brk_mgr.find_breakpoint_at_line(file_path, line.line_number):
                     breakpoint_token = '!'
-                print('{:03d}:{}{} {}'.format(
-                    line.line_number, breakpoint_token, pc_token, line.text), file=fout)
+                out_parts.append('{:03d}:{}{} {}\n'.format(
+                    line.line_number, breakpoint_token, pc_token, line.text))
 
                 if is_error_line:
-                    print('', file=fout)
-                    print(get_stop_reason_str_for_user(
-                            stop_reason, stop_reason_detail),
-                            file=fout)
-                    print('')
+                    out_parts.append('\n{}\n\n'.format(
+                        get_stop_reason_str_for_user(
+                            stop_reason, stop_reason_detail)))
+            self.__out_write(''.join(out_parts))
 
     def __print_breakpoints(self):
         brk_mgr = self.__breakpoints
@@ -1062,19 +1266,23 @@ class CommandLineInterface(object):
     def __print_stack_trace(self, update, last_frame_index=None):
         assert update
         frames = update.get_frames()
-        if last_frame_index == None:  # 0 is a valid value
+        if last_frame_index is None:  # 0 is a valid value
             last_frame_index = len(frames)-1
-        print('Backtrace:')
-        for frame_index in range(last_frame_index, -1, -1):
-            frame = frames[frame_index]
-            self.__print_stack_frame(frame, frame_index)
+        else:
+            frames = frames[:last_frame_index+1]
+        out_parts = ['Backtrace:\n']
+        out_parts.extend(self.__format_stack_frame(frame, frame_index)
+            for frame_index, frame in zip(range(last_frame_index, -1, -1),
+                                          reversed(frames)))
+        self.__out_write(''.join(out_parts))
 
     def __print_stack_frame(self, frame, frame_index):
-        fout = self.__out_file
-        print('#{:<2d} Function {}'.format(
-            frame_index, frame.func_name), file=fout)
-        print('   file/line: {}({})'.format(
-            frame.file_path, frame.line_num), file=fout)
+        self.__out_write(self.__format_stack_frame(frame, frame_index))
+
+    # @return str with two lines, each terminated by a newline
+    def __format_stack_frame(self, frame, frame_index):
+        return '#{:<2d} Function {}\n   file/line: {}({})\n'.format(
+            frame_index, frame.func_name, frame.file_path, frame.line_num)
 
     # "sel" = selected by the user
     def __print_sel_stack_trace(self):
@@ -1095,21 +1303,32 @@ class CommandLineInterface(object):
         if self.__check_debug(3):
             print('debug: print_threads(),selthridx={},selstkidx={}'.format(
                 self.__sel_thread_index, self.__sel_thread_stack_index))
-        fout = self.__out_file
+        # The listing only changes when the threads or the selection
+        # change, and it is printed before every prompt
+        cache = self.__threads_str_cache
+        if cache and cache[0] == self.__threads_epoch:
+            self.__out_write(cache[1])
+            return
         threads = self.__threads
-        if not (threads and len(threads)):
-            print('No threads', file=fout)
+        if not threads:
+            out_parts = ['No threads\n']
         else:
-            print('Threads:')
-            print(_THREAD_HDR_FMT.format(
-                'ID', 'Location', 'Source Code'), file=fout)
-            for iThread in range(len(threads)):
-                self.__print_thread(threads[iThread], iThread)
-        print(' *selected', file=fout)
-        print(file=fout)
+            out_parts = ['Threads:\n']
+            out_parts.append(_THREAD_HDR_FMT.format(
+                'ID', 'Location', 'Source Code'))
+            out_parts.append('\n')
+            for iThread, thread in enumerate(threads):
+                out_parts.append(self.__format_thread(thread, iThread))
+        out_parts.append(' *selected\n\n')
+        out_str = ''.join(out_parts)
+        self.__threads_str_cache = (self.__threads_epoch, out_str)
+        self.__out_write(out_str)
 
     def __print_thread(self, thread_info, thread_index):
-        fout = self.__out_file
+        self.__out_write(self.__format_thread(thread_info, thread_index))
+
+    # @return str with one line, terminated by a newline
+    def __format_thread(self, thread_info, thread_index):
         thread = thread_info
         src_line = None
 
@@ -1130,9 +1349,8 @@ class CommandLineInterface(object):
         primary = ' '
         if thread_index == self.__sel_thread_index:
             primary = '*'
-        print(_THREAD_LINE_FMT.format(
-                    thread_index, primary, file_info, src_line),
-                    file=fout)
+        return _THREAD_LINE_FMT.format(
+                    thread_index, primary, file_info, src_line) + '\n'
 
     def __print_sel_thread(self):
         thread_index = self.__sel_thread_index
@@ -1152,39 +1370,43 @@ class CommandLineInterface(object):
         print('Local Variables:')
 
         vars = update.variables
-        if not (vars and len(vars)):
+        if not vars:
             print('    <NONE>', file=fout)
         else:
-            for var in vars:
-                self.__print_variable(var, 0)
+            lines = [self.__format_variable(var, 0) for var in vars]
+            lines.append('')
+            self.__out_write('\n'.join(lines))
 
     # depth specifies indent
     # name_width:int specifies minimum characters used for variable name
-    def __print_variable(self, var_info, depth, name_width_min=16):
+    # @return str one line, without a newline
+    def __format_variable(self, var_info, depth,
+            name_width_min=_VAR_NAME_WIDTH_DEFAULT):
         if self.__check_debug(5):
-            print('debug: __print_variable(depth={},namewidth={},var=[{}])'.format(
+            print('debug: __format_variable(depth={},namewidth={},var=[{}])'.format(
                 depth, name_width_min, var_info))
-        fout = self.__out_file
         indent = build_indent_str(depth)
 
         var = var_info
         var_name = var.name
-        if var_name == None:
+        if var_name is None:
             var_name = ''
-        if name_width_min >= 1:
+        if name_width_min == _VAR_NAME_WIDTH_DEFAULT:
+            fmt = _VAR_FMT_DEFAULT
+        elif name_width_min >= 1:
             fmt = '{{}}{{:{}s}} {{}}'.format(name_width_min)
         else:
             fmt = '{}{} {}'
-        s = fmt.format(indent, var_name, var.get_type_name_for_user())
+        parts = [fmt.format(indent, var_name, var.get_type_name_for_user())]
         if var.is_keys_case_sensitive:
-            s += " casesensitive"
-        if var.ref_count != None: # 0 is valid
-            s += ' refcnt={}'.format(var.ref_count)
-        if var.element_count != None:  # 0 is valid
-            s += ' el_count:{}'.format(var.element_count)
-        if var.value != None:  # 0 is valid
-            s += ' val:{}'.format(var.get_value_str_for_user())
-        print(s, file=fout)
+            parts.append(' casesensitive')
+        if var.ref_count is not None: # 0 is valid
+            parts.append(' refcnt={}'.format(var.ref_count))
+        if var.element_count is not None:  # 0 is valid
+            parts.append(' el_count:{}'.format(var.element_count))
+        if var.value is not None:  # 0 is valid
+            parts.append(' val:{}'.format(var.get_value_str_for_user()))
+        return ''.join(parts)
 
     def __print_thread_attached_message(
         self, thread_attached_update, threads_update):
@@ -1216,10 +1438,10 @@ class CommandLineInterface(object):
 
     # Gets one-line status to present to user
     def __get_status_line(self):
-        dclient = self.__debugger_client
-        return 'Channel is {}, {}'.format(
-                self.__get_target_state().name.lower(),
-                "connected" if dclient.is_connected() else "disconnected")
+        state_str = _TARGET_STATE_STRS[self.__get_target_state()]
+        conn_str = 'connected' if self.__debugger_client.is_connected() \
+                    else 'disconnected'
+        return f'Channel is {state_str}, {conn_str}'
 
 
     ####################################################################
@@ -1290,9 +1512,10 @@ class CommandLineInterface(object):
                         return
             ok = cmd_spec.func(cmd_spec, cmd_args_str)
             self.__prev_cmd_failed = not ok
-            assert (ok != None), \
-                    'cmd handler did not return a value for {}'.format(\
-                        cmd_spec)
+            if ok is None:
+                raise RuntimeError(
+                    'cmd handler did not return a value for {}'.format(
+                        cmd_spec))
             done = not ok
             if done:
                 if self.__check_debug(1):
@@ -1304,74 +1527,66 @@ class CommandLineInterface(object):
     # is exactly one that matches. Returns None if cmdPrefix
     # matches none or is ambiguous.
     # @return _CmdSpec or None
+    # The set of commands does not change during a session, so the
+    # result for each prefix is cached, including ambiguous prefixes.
     def __match_command(self, cmd_prefix):
         found = None
         try:
             if not cmd_prefix:
                 return found
-
-            found_cmds = []  # _CmdSpec(s)
-            for cmd in self.__all_cmds:
-                if not cmd.is_active:
-                    continue
-
-                cmd_str = cmd.cmd_str
-                cmd_short_aliases = cmd.short_aliases
-                if cmd_short_aliases == None:
-                    cmd_short_aliases = []
-
-                # Look for an exact match
-                found_exact = False
-                if cmd_prefix == cmd_str:
-                    found_exact = True
-                    found_cmds = [cmd]
-                # Short aliases always require an exact match
-                for short_alias in cmd_short_aliases:
-                    if cmd_prefix == short_alias:
-                        found_exact = True
-                        found_cmds = [cmd]
-                if found_exact:
-                    break
-
-                # Look for an abbreviation (prefix match)
-                # Undocumented commands cannot be abbreviated
-                if not cmd.is_visible:
-                    continue
-
-                if ((len(cmd_prefix) <= len(cmd_str)) and
-                    (cmd_prefix == cmd_str[0:len(cmd_prefix)])):
-                        found_cmds.append(cmd)
-
-            found = None
-            if len(found_cmds) < 1:
-                pass
-            elif len(found_cmds) > 1:
-                dups = ''
-                for cmd_spec in found_cmds:
-                    if len(dups):
-                        dups = dups + ','
-                    dups = dups + cmd_spec.get_display_str()
-                print('ERROR: Ambiguous command abbreviation: {} ({})'.format(
-                        cmd_prefix, dups, file=self.__out_file))
-            else:
-                found = found_cmds[0]
+            cached = self.__cmd_match_cache.get(cmd_prefix, None)
+            if not cached:
+                cached = self.__match_command_uncached(cmd_prefix)
+                self.__cmd_match_cache[cmd_prefix] = cached
+            found, err_msg = cached
+            if err_msg:
+                print(err_msg, file=self.__out_file)
         finally:
             if self.__check_debug(5):
                 print('debug: cli: __match_command({}) -> {}'.format(
                     cmd_prefix, found))
         return found
 
+    # @return (_CmdSpec|None, str error message|None)
+    def __match_command_uncached(self, cmd_prefix):
+        # Look for an exact match
+        cmd = self.__exact_cmds.get(cmd_prefix, None)
+        if cmd:
+            return (cmd, None)
+
+        # Look for an abbreviation (prefix match)
+        found_cmds = []  # _CmdSpec(s)
+        cmd_strs = self.__abbrev_cmd_strs
+        i_cmd = bisect.bisect_left(cmd_strs, cmd_prefix)
+        while i_cmd < len(cmd_strs) and cmd_strs[i_cmd].startswith(cmd_prefix):
+            found_cmds.append(self.__abbrev_cmds[i_cmd])
+            i_cmd += 1
+        found_cmds.sort(key=lambda cmd : cmd.sort_order)
+
+        found = None
+        err_msg = None
+        if len(found_cmds) < 1:
+            pass
+        elif len(found_cmds) > 1:
+            dups = ','.join(cmd_spec.get_display_str()
+                            for cmd_spec in found_cmds)
+            err_msg = 'ERROR: Ambiguous command abbreviation: {} ({})'.format(
+                    cmd_prefix, dups)
+        else:
+            found = found_cmds[0]
+        return (found, err_msg)
+
     # break up args_str into the command and an argument string. The
     # returned cmd and/or args may be None
     # return: (cmd:CommandSpec|None, args:str|None)
     def __get_cmd_and_args(self, cmd_line):
-        cmd_line = cmd_line.strip()
-        cmd_parts = re.split('\\s', cmd_line, maxsplit=1)
-        cmd_str = cmd_parts[0].strip()
-        cmd_spec = self.__match_command(cmd_str)
+        cmd_parts = cmd_line.split(None, 1)
+        if not cmd_parts:
+            return (None, None)
+        cmd_spec = self.__match_command(cmd_parts[0])
         cmd_args_str = None
-        if len(cmd_parts) >= 2 and len(cmd_parts[1].strip()):
-            cmd_args_str = cmd_parts[1]
+        if len(cmd_parts) >= 2:
+            cmd_args_str = cmd_parts[1].rstrip()
 
         return (cmd_spec, cmd_args_str)
 
@@ -1381,11 +1596,11 @@ class CommandLineInterface(object):
             print('debug: cli: __handle_cmd_backtrace()')
         if not self.__check_stopped():
             return True
-        if not (self.__threads and len(self.__threads)):
+        if not self.__threads:
             print('No threads')
             return True
         elif not self.__sel_thread_stack_info:
-            caller_data = {CallerKey.BACKTRACE : True}
+            caller_data = _CALLER_DATA_BACKTRACE
             cmd = DebuggerRequest_Stacktrace(
                         self.__sel_thread_index, caller_data=caller_data)
             self.__debugger_client.send(cmd)
@@ -1441,9 +1656,9 @@ class CommandLineInterface(object):
         get_child_keys = True
         var_path = var_path_str.split('.')
         path_force_insensitive = []
-        for i in range(len(var_path)):
-            if var_path[i].endswith("/i"):
-                var_path[i] = var_path[i][0:-2]
+        for i, var_path_elem in enumerate(var_path):
+            if var_path_elem.endswith("/i"):
+                var_path[i] = var_path_elem[0:-2]
                 path_force_insensitive.append(True)
             else:
                 path_force_insensitive.append(False)
@@ -1474,40 +1689,8 @@ class CommandLineInterface(object):
 
     def __print_help_general(self, cmd_spec, args_str):
         fout = self.__out_file
-        print('Roku Remote Debugger Help', file=fout)
-        print(file=fout)
-
-        # Determine the proper column width(s)
-        cmd_width = 0
-        help_width = 0
-        for cmd_entry in self.__all_cmds:
-            if (not cmd_entry.is_visible) or (cmd_entry.is_separator):
-                continue
-            displayStr = cmd_entry.get_display_str(
-                                cmd_entry.show_args_in_short_help)
-            cmd_width = max(cmd_width, len(displayStr))
-            if (cmd_entry.short_desc):
-                help_width = max(help_width, len(cmd_entry.short_desc))
-        # total_width = min(80, cmd_width + help_width + 2) # approximate
-
-        indent_str = ''
-        for _ in range(int((cmd_width)/2)):
-            indent_str += ' '
-
-        # Print the help
-        fmtStr = '{:' + str(cmd_width) + 's}  {}'
-        for cmd_entry in self.__all_cmds:
-            if not cmd_entry.is_visible:
-                continue
-            if cmd_entry.is_separator:
-                sep = '----- {} -----'.format(cmd_entry.cmd_str)
-                print('{}{}'.format(indent_str, sep), file=fout)
-            else:
-                print(fmtStr.format(
-                        cmd_entry.get_display_str(
-                                        cmd_entry.show_args_in_short_help),
-                        cmd_entry.short_desc),
-                        file=fout)
+        self.__out_write(self.__cmd_help_text)
+        indent_str = self.__cmd_help_indent_str
 
         # Print tests, if loaded
         if self.__has_tests():
@@ -1563,7 +1746,7 @@ class CommandLineInterface(object):
         if (self.__sel_thread_index != None) and \
                         (not self.__sel_thread_stack_info):
             # Thread has been selected, but no info has been saved
-            caller_data = {CallerKey.LISTING_FUNCTION : True }
+            caller_data = _CALLER_DATA_LISTING_FUNCTION
             cmd = DebuggerRequest_Stacktrace(
                 self.__sel_thread_index, caller_data=caller_data)
             self.__debugger_client.send(cmd)
@@ -1571,14 +1754,6 @@ class CommandLineInterface(object):
             self.__list_selected_function()
         return True
 
-    # @return true if session should continue, false otherwise
-    def __handle_cmd_out(self, cmd_spec, args_str):
-        return self.__handle_cmd_step_any(cmd_spec, StepType.OUT)
-
-    # @return true if session should continue, false otherwise
-    def __handle_cmd_over(self, cmd_spec, args_str):
-        return self.__handle_cmd_step_any(cmd_spec, StepType.OVER)
-
     # Print the value of one variable
     # @return True if command processing should continue, false otherwise
     def __handle_cmd_show(self, cmd_spec, args_str):
@@ -1602,11 +1777,10 @@ class CommandLineInterface(object):
         print(self.__get_status_line(), file=self.__out_file)
         return True
 
+    # Handles the over, out and step commands
+    # @param step_type bound by the command table
     # @return true if session should continue, false otherwise
-    def __handle_cmd_step(self, cmd_spec, args_str):
-        return self.__handle_cmd_step_any(cmd_spec, StepType.LINE)
-
-    def __handle_cmd_step_any(self, cmd_spec, step_type):
+    def __handle_cmd_step_any(self, cmd_spec, args_str, step_type):
         assert isinstance(step_type, StepType)
         if self.__check_debug(2):
             print('debug: __handle_cmd_step_any({})'.format(step_type.name))
@@ -1671,6 +1845,9 @@ class CommandLineInterface(object):
         self.__test_or_debugger_client_changed()
         self.__debugger_client.connect()
         self.__channel_zip_file_path = channel_package_path
+        # Source files may have changed since they were cached by linecache
+        # (e.g., the channel was re-deployed)
+        linecache.checkcache()
         self._src_inspector = SourceCodeInspector(channel_package_path)
         return True
 
@@ -1704,7 +1881,7 @@ class CommandLineInterface(object):
     def __handle_cmd_threads(self, cmd_spec, args_str):
         if self.__check_debug(2):
             print('debug: __handle_cmd_threads({})'.format(args_str))
-        caller_data = {CallerKey.LISTING_THREADS:True}
+        caller_data = _CALLER_DATA_LISTING_THREADS
         cmd = DebuggerRequest_Threads(caller_data)
         self.__debugger_client.send(cmd)
         return True
@@ -2056,8 +2233,9 @@ class CommandLineInterface(object):
         fout = self.__out_file
         update_type = update.update_type
         request = update.request
+        request_id = update.request_id
 
-        if update.request_id:
+        if request_id:
             # Response to a specific request
             if not request:
                 do_exit(1,
@@ -2066,7 +2244,7 @@ class CommandLineInterface(object):
                 do_exit(1, 'INTERNAL ERROR:'\
                     ' update with request ID has bad UpdateType: {}'.format(
                         update_type))
-            assert update.request_id == request.request_id
+            assert request_id == request.request_id
 
         else:
             # Update with no request ID
@@ -2093,17 +2271,21 @@ class CommandLineInterface(object):
         elif update.invalid_value_path_index != None: # 0 is valid
             handled = True
             print('ERROR: Invalid value in variable path: {}'.format(
-                '.'.join(update.request.variable_path[0:update.invalid_value_path_index+1])))
+                '.'.join(request.variable_path[0:update.invalid_value_path_index+1])))
         elif update.missing_key_path_index != None: # 0 is valid
             handled = True
             print('ERROR: Key or variable not found in variable path: {}'.format(
-                '.'.join(update.request.variable_path[0:update.missing_key_path_index+1])))
+                '.'.join(request.variable_path[0:update.missing_key_path_index+1])))
         else:
             handled = True
             print('ERROR: error received from target: {} ({})'.format(
                 err_code.value, err_code.name),
                 file=fout)
 
+        # An error ends the stop sequence, so the prompt is not held off
+        if handled and self.__request_has_caller_key(request, CallerKey.STOPPING):
+            self.__set_is_stopping(False)
+
         return not handled
 
     # Process an update from the debug target. The update may be a
@@ -2111,66 +2293,24 @@ class CommandLineInterface(object):
     def __handle_update(self, update):
         if self.__check_debug(3):
             print('debug: cli: __handle_update({})'.format(update))
-        fout = self.__out_file
-        update_type = update.update_type
         request = update.request  # May be None
-        cmd_code = None
-        if request:
-            cmd_code = request.cmd_code
-        update_type = update.update_type
-
-        if update_type == UpdateType.ALL_THREADS_STOPPED:
-            self.__handle_update_all_threads_stopped(update)
-        elif update_type == UpdateType.BREAKPOINT_ERROR:
-            self.__handle_update_breakpoint_error(update)
-        elif update_type == UpdateType.COMPILE_ERROR:
-            self.__handle_update_compile_error(update)
-        elif update_type == UpdateType.THREAD_ATTACHED:
-            self.__handle_update_thread_attached(update)
-        elif update_type == UpdateType.BREAKPOINT_VERIFIED:
-            self.__handle_update_breakpoint_verified(update)
-        elif update_type == UpdateType.PROTOCOL_ERROR:
-            self.__handle_update_protocol_error(update)
+        handler = self.__update_handlers.get(update.update_type, None)
 
         # The UpdateType for all responses to specific commands is
         # COMMAND_RESPONSE, so the actual type of the data is determined
         # by the CmdCode that was sent with the request.
+        if not handler:
+            if request:
+                handler = self.__response_handlers.get(request.cmd_code, None)
 
-        elif cmd_code == CmdCode.ADD_BREAKPOINTS:
-            self.__handle_update_add_breakpoints(update)
-        elif cmd_code == CmdCode.ADD_CONDITIONAL_BREAKPOINTS:
-            self.__handle_update_add_breakpoints(update)
-        elif cmd_code == CmdCode.CONTINUE:
-            self.__handle_update_continue_response(update)
-        elif cmd_code == CmdCode.EXECUTE:
-            self.__handle_update_execute(update)
-        elif cmd_code == CmdCode.EXIT_CHANNEL:
-            self.__handle_update_exit_channel(update)
-        elif cmd_code == CmdCode.LIST_BREAKPOINTS:
-            self.__handle_update_list_breakpoints(update)
-        elif cmd_code == CmdCode.REMOVE_BREAKPOINTS:
-            self.__handle_update_remove_breakpoints(update)
-        elif cmd_code == CmdCode.STACKTRACE:
-            self.__handle_update_stack_trace(update)
-        elif cmd_code == CmdCode.STEP:
-            pass
-        elif cmd_code == CmdCode.STOP:
-            self.__set_target_state(_TargetState.STOPPED)
-        elif cmd_code == CmdCode.THREADS:
-            self.__handle_update_threads(update)
-        elif cmd_code == CmdCode.VARIABLES:
-            self.__handle_update_variables(update)
-        elif cmd_code == CmdCode.EXECUTE:
-            self.__handle_update_execute(update)
+        if handler:
+            handler(update)
         else:
             if self.__check_debug(1):
                 msg = 'debug: cli: err: unrecognized update: {}'.format(update)
                 print(msg)
                 raise AssertionError(msg)
 
-        if self.__check_debug(3):
-            print('debug: cli: __handle_update() done')
-
     def __handle_update_add_breakpoints(self, update):
         if self.__check_debug(3):
             print('debug: cli: handle_update_add_breakpoints({})'.format(update))
@@ -2230,6 +2370,12 @@ class CommandLineInterface(object):
                         not self.__test_mgr.test_is_running(test):
             self.__test_mgr.start_current_test(dclient)
 
+    def __handle_update_step_response(self, update):
+        pass
+
+    def __handle_update_stop_response(self, update):
+        self.__set_target_state(_TargetState.STOPPED)
+
     def __handle_update_protocol_error(self, update):
         if self.__check_debug(3):
             print('debug: cli: __handle_update_protocol_error({})'.format(update))
@@ -2238,7 +2384,6 @@ class CommandLineInterface(object):
             print("debug protocol error: IO port fail");
 
     def __handle_update_all_threads_stopped(self, update) -> None:
-        fout = self.__out_file
         self.__set_target_state(_TargetState.STOPPED)
         primary_thridx = update.primary_thread_index
         if primary_thridx < 0:
@@ -2254,16 +2399,11 @@ class CommandLineInterface(object):
                 self.__debugger_client.send(DebuggerRequest_Continue(self.__protocol_version))
                 return None
 
-        print('', file=fout)
-        print(get_stop_reason_str_for_user(
-                update.stop_reason, update.stop_reason_detail),
-                file=fout)
-        print('{}CHANNEL STOPPED ({})'.format(
-                    _COMMAND_PROMPT,
-                    get_stop_reason_str_for_user(
-                        update.stop_reason, update.stop_reason_detail)),
-                file=fout)
-        print('', file=fout)
+        reason_str = get_stop_reason_str_for_user(
+                update.stop_reason, update.stop_reason_detail)
+        self.__out_write('\n{}\n{}CHANNEL STOPPED ({})\n\n'.format(
+                reason_str, _COMMAND_PROMPT, reason_str))
+        self.__set_is_stopping(True)
         cmd = DebuggerRequest_Threads(caller_data=
             {CallerKey.STOPPING:{
                 _LITERAL_PRIMARY_THREAD_INDEX:update.primary_thread_index}})
@@ -2346,13 +2486,12 @@ class CommandLineInterface(object):
             print('debug: cli: handle_update_exit_channel({})'\
                   ',waitingtoexit={}'.format(update,
                     self.__shutdown_waiting_on_exit_channel))
-        fout = self.__out_file
         self.__set_target_state(_TargetState.TERMINATED)
+        self.__set_is_stopping(False)
         if self.__shutdown_waiting_on_exit_channel:
             self.__channel_exited_or_timeout(True)
         else:
-            print(file=fout)
-            print(self.__get_status_line(),file=fout)
+            self.__out_write('\n{}\n'.format(self.__get_status_line()))
 
     def __channel_exited_or_timeout(self, received_exit_channel_response):
         if self.__check_debug(3):
@@ -2445,7 +2584,7 @@ class CommandLineInterface(object):
         # STOPPING ALL THREADS
 
         if self.__request_has_caller_key(request, CallerKey.STOPPING):
-            caller_data = dict(request.caller_data)
+            caller_data = request.caller_data
 
             # It's possible that a stack trace comes back empty. If so,
             # we can't request variables in a given stack frame (there aren't any)
@@ -2460,6 +2599,7 @@ class CommandLineInterface(object):
                             self.__sel_thread_index,
                             self.__sel_thread_stack_index))
                 self.__print_crash_dump()
+                self.__set_is_stopping(False)
             else:
                 cmd = DebuggerRequest_Variables(
                     self.__sel_thread_index,
@@ -2474,7 +2614,7 @@ class CommandLineInterface(object):
 
         elif self.__request_has_caller_key(request,
                                             CallerKey.SELECTING_THREAD):
-            caller_data = dict(request.caller_data)
+            caller_data = request.caller_data
 
             # It's possible that a stack trace comes back empty. If so,
             # we can't request variables in a given stack frame (there aren't any)
@@ -2529,14 +2669,14 @@ class CommandLineInterface(object):
         if self.__check_debug(3):
             print('debug: handle_update_threads({})'.format(update))
         self.__threads = update.threads
+        self.__threads_epoch += 1
         request = update.request
         caller_data = None
 
         # find the primary/selected thread
         primary_thread_index = -1
         primary_count = 0
-        for i in range(len(update.threads)):
-            thread = update.threads[i]
+        for i, thread in enumerate(update.threads):
             if thread.is_primary:
                 primary_thread_index = i
                 primary_count += 1
@@ -2544,7 +2684,7 @@ class CommandLineInterface(object):
             assert primary_count == 1
 
         if self.__request_has_caller_key(request, CallerKey.STOPPING):
-            caller_data = dict(request.caller_data) # dup it
+            caller_data = request.caller_data
             self.__set_sel_thread(primary_thread_index)
 
             # Stopped for any number of reasons, provide details
@@ -2577,6 +2717,7 @@ class CommandLineInterface(object):
         if self.__request_has_caller_key(request, CallerKey.STOPPING):
             # This is the last request needed to provide a stop/crash dump
             self.__print_crash_dump()
+            self.__set_is_stopping(False)
 
             if self.__check_debug(1): # 1 = validate
                 self.__validate_when_stopped()
@@ -2591,6 +2732,10 @@ class CommandLineInterface(object):
         else:
             self.__print_all_variables(update)
 
+    def __set_is_stopping(self, is_stopping):
+        with self.__self_state_lock:
+            self.__is_stopping = is_stopping
+
     # @return previous state
     def __set_target_state(self, new_state):
         with self.__target_state_lock:
@@ -2606,9 +2751,10 @@ class CommandLineInterface(object):
 
             return prev_state
 
+    # Reading one attribute is atomic, so no lock is needed. The lock in
+    # __set_target_state() protects its check-then-set sequence.
     def __get_target_state(self):
-        with self.__target_state_lock:
-            return self.__target_state
+        return self.__target_state
 
     def __get_num_threads(self):
         if self.__threads:
@@ -2619,9 +2765,8 @@ class CommandLineInterface(object):
     def __request_has_caller_key(self, request, key):
         assert (request == None) or isinstance(request, DebuggerRequest)
         assert (key == None) or isinstance(key, CallerKey)
-        ret_val = False
-        if request and key and request.caller_data:
-            ret_val = (key in request.caller_data)
+        caller_data = request.caller_data if request else None
+        ret_val = bool(key and caller_data and (key in caller_data))
         if self.__check_debug(5):
             print('debug: cli: has_caller_key({},{}) -> {}'.format(request, key, ret_val))
         return ret_val
@@ -2636,9 +2781,7 @@ class CommandLineInterface(object):
         if self.__check_debug(5):
             print('debug: cli: update_received(response={})'.format(response))
 
-        self.__debugger_update_queue.put(response)  # thread-safe
-        with self.__input_cond_var:
-            self.__input_cond_var.notify_all()
+        self.__events.put((_EventKind.DEBUGGER_UPDATE, response))
 
         # Short-circuit an exited response -- the connection should be closed
         if request and (request.cmd_code == CmdCode.EXIT_CHANNEL):
@@ -2651,14 +2794,11 @@ class CommandLineInterface(object):
     def _user_input_received(self, cmd_line):
         if self.__check_debug(3):
             print('debug: cli: __user_input_received, cmdline={}'.format(cmd_line))
-        self.__user_input_queue.put(cmd_line)  # thread-safe
-        with self.__input_cond_var:
-            self.__input_cond_var.notify_all()
+        self.__events.put((_EventKind.USER_INPUT, cmd_line))
 
     # Validate data after a stop has completed and all data retrieved
     def __validate_when_stopped(self):
-        has_line_number_bug = self.__debugger_client.has_feature( \
-                ProtocolFeature.BAD_LINE_NUMBER_IN_STACKTRACE_BUG)
+        has_line_number_bug = self.__has_bad_line_number_bug
         tests_passed = []
         if self.__check_debug(3):
             print(f'debug: cli: validate when stopped (linenum fixup={has_line_number_bug})')
@@ -2672,27 +2812,19 @@ class CommandLineInterface(object):
                 print(f'debug: cli: stopped: tests passed: {tests_passed}')
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self.__debug_level >= min_level
 #END class CommandLineInterface
 
 
+# Indent strings for common depths, so that they are not re-built
+_INDENTS = tuple('    ' * depth for depth in range(32))
+
 def build_indent_str(depth):
-    if depth == None:
-        depth = 0
-    s = ''
-    for _ in range(0,depth):
-        s = s + '    '
-    return s
-
-def safe_len(obj):
-    if obj:
-        return len(obj)
-    return 0
-
-def is_empty(obj):
-    return not (obj and len(obj))
+    if not depth:
+        return ''
+    if depth < len(_INDENTS):
+        return _INDENTS[depth]
+    return '    ' * depth
 
 def noop_func():
     pass
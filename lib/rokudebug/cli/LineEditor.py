@@ -75,6 +75,9 @@ class LineEditor(object):
     # may be empty if there are no completions.
     def __init__(self, controller):
         self.__self_debug_level = 0
+        # __check_debug() runs on every keystroke, so resolve this once
+        self.__effective_debug_level = max(global_config.debug_level,
+                                    _module_debug_level, self.__self_debug_level)
         if self.__check_debug(5):
             print('debug: lined: init()')
 
@@ -94,7 +97,7 @@ class LineEditor(object):
 
         atexit.register(self._at_exit)
 
-    # @return LineEditorState
+    # @return str, or None if the end of input has been reached
     def input(self, prompt=None):
         global _platform_has_readline
         if not prompt:
@@ -118,6 +121,11 @@ class LineEditor(object):
                     line = input(prompt)
                     done = True
                 except EOFError:
+                    if not sys.stdin.isatty():
+                        # True end of input (e.g., a closed pipe). Retrying
+                        # would spin, because every read raises EOFError
+                        line = None
+                        break
                     if _platform_has_readline:
                         line = readline.get_line_buffer()
                         if self.__check_debug(2):
@@ -218,9 +226,7 @@ class LineEditor(object):
         return completion
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, _module_debug_level,
-                  self.__self_debug_level)
-        return lvl >= min_level
+        return self.__effective_debug_level >= min_level
 
     def _restore_tty(self):
         if self.__saved_tty_attrs:
@@ -72,5 +72,8 @@ class NullDebuggerClient(AbstractDebuggerClient):
     def has_pending_request(self):
         return False
 
+    def get_listener_error(self):
+        return None
+
     def shutdown(self):
         pass
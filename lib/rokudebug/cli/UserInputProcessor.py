@@ -50,6 +50,10 @@ class UserInputProcessor(object):
     def __init__(self, prompt_lines, input_listener, cmd_completer, fin, fout):
         super(UserInputProcessor, self).__init__()
         self._debug_level = 0
+        # global debug_level does not change after startup
+        self.__effective_debug_level = max(global_config.debug_level,
+                                           self._debug_level)
+        assert global_config.debug_level >= 0 and self._debug_level >= 0
         self.__input_listener = input_listener
         self.__cmd_completer = cmd_completer
         self.__lock = threading.Lock()
@@ -60,6 +64,7 @@ class UserInputProcessor(object):
         self.__input_count = 0
         self.__input_ok = False
         self.__reading_input_now = False
+        self.__is_shut_down = False
 
         # Used by get_input_line_sync(). Protected with self.__lock
         self.__return_input_sync = False
@@ -84,6 +89,9 @@ class UserInputProcessor(object):
         saved_prompt_lines = None
         input_str = None
         with self.__lock:
+            if self.__is_shut_down:
+                # The processor thread is gone, nothing would ever answer
+                return None
             if self.__return_input_sync:
                 # Overlapping calls are not allowed
                 if self.__check_debug(1): # 1 == validation
@@ -129,6 +137,14 @@ class UserInputProcessor(object):
             self.__input_ok = True
             self.__condition.notify_all()
 
+    # Causes the processor thread to exit, the next time it waits for
+    # permission to read input. A read already in progress is not
+    # interrupted.
+    def shutdown(self):
+        with self.__lock:
+            self.__is_shut_down = True
+            self.__condition.notify_all()
+
     def simulate_input(self, cmd_str):
         fout = self.__out_file
         print('{} {}'.format(_SIMULATED_COMMAND_PROMPT, cmd_str), file=fout)
@@ -141,8 +157,10 @@ class UserInputProcessor(object):
         line_editor = LineEditor(self.__cmd_completer)
         while True:
             with self.__lock:
-                while not self.__input_ok:
+                while not (self.__input_ok or self.__is_shut_down):
                     self.__condition.wait()
+                if self.__is_shut_down:
+                    break
                 self.__reading_input_now = True
 
             line_prompt = ''
@@ -153,6 +171,9 @@ class UserInputProcessor(object):
             sys.stderr.flush()
             self.__print_prompt_prelude()
             cmd_line = line_editor.input(line_prompt)
+            if cmd_line is None:
+                self.__handle_end_of_input()
+                break
 
             return_sync = False
             has_input = False
@@ -182,6 +203,22 @@ class UserInputProcessor(object):
         if self.__check_debug(2):
             print('debug: uip: user input thread exiting')
 
+    # No more input will ever arrive, so release any caller blocked in
+    # read_line_sync() and stop this thread. The session is not ended:
+    # it may still be running unattended (e.g., a test with --run-test),
+    # and ends as it would have with input available.
+    def __handle_end_of_input(self):
+        if self.__check_debug(2):
+            print('debug: uip: end of input')
+        with self.__lock:
+            self.__reading_input_now = False
+            self.__input_ok = False
+            self.__is_shut_down = True
+            if self.__return_input_sync:
+                self.__return_input_sync_str = None
+                self.__return_input_sync_str_valid = True
+                self.__condition.notify_all()
+
     # prints all but the last prompt line, which is printed by the input()
     # command.
     def __print_prompt_prelude(self):
@@ -204,8 +241,6 @@ class UserInputProcessor(object):
             global_config.do_exit(1, "INTERNAL ERROR: uncaught exception")
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self.__effective_debug_level >= min_level
 
 #END: class UserInputProcessor
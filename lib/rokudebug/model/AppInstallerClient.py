@@ -96,27 +96,48 @@ USER_NAME = 'rokudev'
 UTF8 = 'utf-8'
 PORT = 80
 
+# Matches each name="value" pair in a WWW-Authenticate header
+_AUTH_FIELD_RE = re.compile(r'(\w+)="([^"]*)"')
+
+# Fixed part of the digest Authorization header value
+_AUTH_HEADER_PREFIX = 'Digest username="{}", algorithm=MD5, '.format(
+                            USER_NAME).encode(UTF8)
+
 
 class AppInstallerClient(object):
+    # Most recent digest challenge from each target, keyed by net loc
+    __last_challenges = dict()
+    __challenge_lock = threading.Lock()
+
     def __init__(self, ip_addr, user_password):
         self._debug_level = 0
         self.__thread = None
         self.__ip_addr = ip_addr
         self.__user_password = user_password
+        self.__user_password_bytes = user_password.encode(UTF8)
+        self.__ha1_by_realm = {}    # realm:HA1, HA1 never changes per realm
+        self.__user_agent_header = ('User-Agent', 'rokudebug/{}'.format(
+                                        global_config.get_version_str()))
         self.__installer_base_url = \
              'http://{}:{}/plugin_install'.format(self.__ip_addr, PORT)
+        # The URL never changes, so split it only once
+        url_parts = urlparse(self.__installer_base_url)
+        self.__installer_net_loc = url_parts.netloc   # 'host[:port]'
+        self.__installer_path = url_parts.path or '/'
 
     def get_target_ip_addr(self):
         return self.__ip_addr
 
     def remove(self):
         print('info: Removing dev channel, if installed...')
-        (boundary, body_data) = HTTPConnection.buildMultipartFormData([
+        fields = [
             HTTPFormFieldSpec('mysubmit', 'Delete'),
             HTTPFormFieldSpec('archive', ''),
-        ])
-        headers = self.__get_headers_for_post(boundary, body_data)
-        self.do_post(headers, body_data)
+        ]
+        (boundary, content_length) = \
+            HTTPConnection.computeMultipartLength(fields)
+        headers = self.__get_headers_for_post(boundary, content_length)
+        self.do_post(headers, boundary, fields)
 
     # @return void
     def install(self, channel_file_path, remote_debug, asynchronous=True):
@@ -134,13 +155,26 @@ class AppInstallerClient(object):
     def install_impl(self, channel_file_path, remote_debug):
         channel_file_name = os.path.basename(channel_file_path)
         print('info: Installing dev channel ({})...'.format(channel_file_name))
-        f = open(channel_file_path, 'rb')
-        channel_contents = f.read()
-        f.close()
+        # Connect to the target while the channel file is being opened
+        # and measured, because neither depends upon the other.
+        connector = _HTTPConnector(self.__installer_net_loc, self._debug_level)
+        connector.start()
+        try:
+            # The open channel file is passed all the way through to the
+            # socket, where it is sent with sendfile(), so the contents are
+            # never copied into python memory.
+            with open(channel_file_path, 'rb') as channel_file:
+                return self.__install_file(channel_file_path, channel_file,
+                    remote_debug, connector)
+        finally:
+            connector.discard()
 
+    # @return void
+    def __install_file(self, channel_file_path, channel_file, remote_debug,
+            connector):
         fields = [
             HTTPFormFieldSpec('mysubmit', 'Install'),
-            HTTPFormFieldSpec('archive', channel_contents,
+            HTTPFormFieldSpec('archive', channel_file,
                 attributes=['filename',
                             os.path.basename(channel_file_path)],
                 contentType='application/octet-stream'),
@@ -148,12 +182,18 @@ class AppInstallerClient(object):
         if remote_debug:
             fields.append(HTTPFormFieldSpec('remotedebug', '1'))
             fields.append(HTTPFormFieldSpec('remotedebug_connect_early', '1'))
-        (boundary, body_data) = HTTPConnection.buildMultipartFormData(fields)
-        headers = self.__get_headers_for_post(boundary, body_data)
-        return self.do_post(headers, body_data)
-
+        (boundary, content_length) = \
+            HTTPConnection.computeMultipartLength(fields)
+        headers = self.__get_headers_for_post(boundary, content_length)
+        return self.do_post(headers, boundary, fields, connector)
+
+    # The body is never built in memory; fields are streamed to the
+    # server as a multipart/form-data body, with the given boundary.
+    # @param boundary from HTTPConnection.computeMultipartLength(fields)
+    # @param fields list of HTTPFormFieldSpec
+    # @param connector if not None, a started _HTTPConnector to this target
     # @return void
-    def do_post(self, headers, body_data):
+    def do_post(self, headers, boundary, fields, connector=None):
         # The Roku Application Installer uses digest authentication. This
         # is how the upload typically works:
         #
@@ -176,24 +216,33 @@ class AppInstallerClient(object):
         # 8) This client sends the message body
         # 9) The server responds with "200 OK"
         #
+        # If a challenge was received from the target in an earlier request,
+        # this client includes an "Authorization" header in step 1, derived
+        # from that challenge. If the server accepts it, the server responds
+        # with "100 Continue" and steps 3-6 are skipped. If not (e.g., the
+        # nonce has expired), the server responds 401 as above.
+        #
 
         url = self.__installer_base_url
+        netLoc = self.__installer_net_loc
+        path = self.__installer_path
         conn = None
 
         try:
-            url_parts = urlparse(url)
-            netLoc = url_parts[1]  # netLoc = 'host[:port]'
-            path = ''
-            for i in range(2, len(url_parts)):
-                path += url_parts[i]
-
             # Send the request
 
-            conn = HTTPConnection(netLoc)
-            conn.set_debug_level(self._debug_level)
-            conn.connect()
+            if connector:
+                conn = connector.take_connection()
+            else:
+                conn = HTTPConnection(netLoc)
+                conn.set_debug_level(self._debug_level)
+                conn.connect()
+            request_headers = list(headers)
+            if self.__add_cached_auth_header(request_headers, path):
+                if self.__check_debug(2):
+                    print('debug: appinst: sending auth from previous challenge')
             conn.putRequest('POST', path)  # takes path, not URL (despite docs)
-            conn.putHeaders(headers)
+            conn.putHeaders(request_headers)
             conn.endHeaders()
 
             # Wait for a response
@@ -220,33 +269,36 @@ class AppInstallerClient(object):
                             contentLenStr))
 
                 self.__add_digest_auth_headers(
-                    headers, responseHeaders, path, self.__user_password)
+                    headers, responseHeaders, path)
                 if self.__check_debug(2):
                     print("debug: appinst: sending follow-up to 401 error, headers={}".format(
                         headers))
-                conn = HTTPConnection(netLoc)
-                conn.set_debug_level(self.__check_debug(1))
-                conn.connect()
-                conn.putRequest('POST', path)
-                conn.putHeaders(headers)
-                conn.endHeaders()
-                response = conn.getResponse()
-                if response.mStatus == 100:
-                    if self.__check_debug(3):
-                        print('debug: appinst: recv: {}'.format(response))
-                else:
-                    global_config.do_exit(1,
-                        'Bad response from app installer: {} {}'.format(
-                        response.mStatus, response.mReason))
-                conn.send(body_data)
-                response = conn.getResponse()
-                print('info: final response from device: {} {}'.format(
-                        response.mStatus, response.mReason))
-                conn.close()
+                # Re-use the same connection (keep-alive), unless the
+                # server has said that it is closing it. The server may
+                # also drop a kept-alive connection without saying so, in
+                # which case reconnect once and send the request again.
+                try:
+                    conn.reset_request_state()
+                    response = self.__send_post_headers(conn, path, headers)
+                except OSError as e:
+                    if self.__check_debug(2):
+                        print('debug: appinst: retry failed ({}), reconnecting'.format(e))
+                    conn.close()
+                    conn.connect()
+                    response = self.__send_post_headers(conn, path, headers)
+
+            if response.mStatus == 100:
+                if self.__check_debug(3):
+                    print('debug: appinst: recv: {}'.format(response))
             else:
                 global_config.do_exit(1,
                     'Bad response from app installer: {} {}'.format(
                     response.mStatus, response.mReason))
+            conn.sendMultipartFields(boundary, fields)
+            response = conn.getResponse()
+            print('info: final response from device: {} {}'.format(
+                    response.mStatus, response.mReason))
+            conn.close()
 
             if self.__check_debug(3):
                 print('debug: appinst: POST response, uri={}: {} {}, headers={}'.format(
@@ -269,92 +321,130 @@ class AppInstallerClient(object):
         if self.__check_debug(2):
             print('debug: appinst: http response: {}'.format(response))
 
+    # Sends a POST request's line and headers, without the body
+    # @return HTTPResponse
+    def __send_post_headers(self, conn, path, headers):
+        conn.putRequest('POST', path)  # takes path, not URL (despite docs)
+        conn.putHeaders(headers)
+        conn.endHeaders()
+        return conn.getResponse()
+
     # @return dict of header name:value
     def __get_headers_for_get(self):
-        headers = self.__get_common_headers(None)
+        headers = self.__get_common_headers(0)
         return headers
 
     # @return list of header (name,value) tuples
-    def __get_headers_for_post(self, boundary, body_data):
-        headers = self.__get_common_headers(body_data)
+    def __get_headers_for_post(self, boundary, content_length):
+        headers = self.__get_common_headers(content_length)
         headers.append(('Content-Type', 'multipart/form-data; boundary={}'.\
             format(boundary)))
         headers.append(('Expect', '100-continue'))
         return headers
 
     # @return list of header (name,value) tuples
-    def __get_common_headers(self, body_data):
-        body_len = 0
-        if body_data:
-            body_len = len(body_data)
+    def __get_common_headers(self, content_length):
         return [
             ('Accept', '*/*'),
-            ('Content-Length', body_len),
-            ('User-Agent', 'rokudebug/{}'.format(
-                                global_config.get_version_str()))
+            ('Connection', 'keep-alive'),
+            ('Content-Length', content_length),
+            self.__user_agent_header
         ]
 
-    def __calc_md5_for_header(self, value):
-        value_bytes = value
-        if isinstance(value, str):
-            value_bytes = value.encode(UTF8)
-        return hashlib.md5(value_bytes).hexdigest()
-
+    # @return str HA1 for digest authentication (memoized per realm)
+    def __get_ha1(self, realm):
+        ha1 = self.__ha1_by_realm.get(realm)
+        if not ha1:
+            ha1 = _md5hex(b':'.join([USER_NAME.encode(UTF8),
+                realm.encode(UTF8), self.__user_password_bytes]))
+            self.__ha1_by_realm[realm] = ha1
+        return ha1
 
     # See doPost() for comments regarding the deficiencies in the
     # python3 http client packages, that require this to be done here.
+    # The password is the one passed to __init__()
     def __add_digest_auth_headers(self, headers, http_401_response_headers,
-            path, passwd):
-        auth_val = None
-        conent_length_str = None
-        for (name, value) in http_401_response_headers:
-            if name == 'WWW-Authenticate':
-                auth_val = value
-            if name == 'Content-Length':
-                conent_length_str = value
-
+            path):
+        # HTTP header names are case-insensitive
+        response_headers = {name.lower(): value
+                                for (name, value) in http_401_response_headers}
+        auth_val = response_headers.get('www-authenticate')
+        conent_length_str = response_headers.get('content-length')
+
+        # Validate before parsing, so that a malformed response fails
+        # with a useful message (and not only when asserts are enabled)
+        if not auth_val:
+            raise ValueError('401 response is missing WWW-Authenticate header')
         content_length = None
         try:
             content_length = int(conent_length_str)
-        except Exception as e:
-            sys.stdout.flush()
-            traceback.print_exc(file=sys.stderr)
-            print('Bad Content-Length: {}'.format(e))
-
-        assert auth_val
-        assert content_length != None    # 0 is valid
+        except (TypeError, ValueError):
+            pass
+        if content_length is None:    # 0 is valid
+            raise ValueError(
+                '401 response has missing or invalid Content-Length: {}'.format(
+                    conent_length_str))
 
         # server nonce is a one-time use key used for secure hashing
-        # REMIND: handle None return from search() (perhaps try/except)
-        server_nonce = re.search('nonce="(.*?)"', auth_val).group(1)
-        realm = re.search('realm="(.*?)"', auth_val).group(1)
-        qop = re.search('qop="(.*?)"', auth_val).group(1)
+        # All fields are parsed in one pass over the header value
+        auth_params = dict(_AUTH_FIELD_RE.findall(auth_val))
+        for name in ('nonce', 'realm', 'qop'):
+            if name not in auth_params:
+                raise ValueError(
+                    'WWW-Authenticate header is missing {}: {}'.format(
+                        name, auth_val))
+        challenge = _DigestChallenge(
+            auth_params['nonce'], auth_params['realm'], auth_params['qop'])
+        with AppInstallerClient.__challenge_lock:
+            AppInstallerClient.__last_challenges[self.__installer_net_loc] = \
+                challenge
+            nonce_count = challenge.get_next_nonce_count()
+        self.__append_auth_header(headers, path, challenge, nonce_count)
+
+    # Adds an Authorization header derived from the most recent challenge
+    # received from this target, if any, so that the server may accept the
+    # request without first responding "401 Unauthorized".
+    # @return True if a header was added, False if no challenge is known
+    def __add_cached_auth_header(self, headers, path):
+        with AppInstallerClient.__challenge_lock:
+            challenge = AppInstallerClient.__last_challenges.get(
+                self.__installer_net_loc)
+            if not challenge:
+                return False
+            nonce_count = challenge.get_next_nonce_count()
+        self.__append_auth_header(headers, path, challenge, nonce_count)
+        return True
+
+    def __append_auth_header(self, headers, path, challenge, nonce_count):
+        server_nonce = challenge.server_nonce
+        realm = challenge.realm
+        qop = challenge.qop
 
         # client nonce is generated by the client (this program) and is used
         # by the server to securely hash responses
-        client_nonce_int = 0
-        for b in os.urandom(4):
-            client_nonce_int <<= 8
-            client_nonce_int |= b
-        client_nonce = '{:08x}'.format(client_nonce_int)
-
-        # client nonce count must increase with each request, for cryptographic
-        # security. However, we are sending only one request with this nonce.
-        client_nonce_count = "00000001"
-
-        ha1 = self.__calc_md5_for_header('{}:{}:{}'.format(
-            USER_NAME, realm, passwd))
-        ha2 = self.__calc_md5_for_header('POST:{}'.format(path))
-        response = self.__calc_md5_for_header('{}:{}:{}:{}:{}:{}'.format(
-            ha1, server_nonce, client_nonce_count, client_nonce, qop, ha2))
-        headers.append(('Authorization',
-            'Digest'
-            ' username="{}", realm="{}", nonce="{}", uri="{}"'
-            ', algorithm={}, response="{}", qop={}'
-            ', nc={}, cnonce="{}"'.format(
-                USER_NAME, realm, server_nonce, path, 'MD5',
-                response, qop, client_nonce_count, client_nonce)
-        ))
+        client_nonce = os.urandom(4).hex().encode(UTF8)
+
+        # client nonce count must increase with each request that uses the
+        # same server nonce, for cryptographic security.
+        client_nonce_count = '{:08x}'.format(nonce_count).encode(UTF8)
+
+        realm_bytes = realm.encode(UTF8)
+        server_nonce_bytes = server_nonce.encode(UTF8)
+        path_bytes = path.encode(UTF8)
+        qop_bytes = qop.encode(UTF8)
+        ha1 = self.__get_ha1(realm).encode(UTF8)
+        ha2 = _md5hex(b'POST:' + path_bytes).encode(UTF8)
+        response = _md5hex(b':'.join([ha1, server_nonce_bytes,
+            client_nonce_count, client_nonce, qop_bytes, ha2])).encode(UTF8)
+        headers.append(('Authorization', b''.join([
+            _AUTH_HEADER_PREFIX,
+            b'realm="', realm_bytes,
+            b'", nonce="', server_nonce_bytes,
+            b'", uri="', path_bytes,
+            b'", response="', response,
+            b'", qop=', qop_bytes,
+            b', nc=', client_nonce_count,
+            b', cnonce="', client_nonce, b'"'])))
 
     def __check_debug(self, min_level):
         lvl = max(global_config.debug_level, self._debug_level)
@@ -362,3 +452,68 @@ class AppInstallerClient(object):
         return lvl >= min_level
 
 #END class AppInstallerClient
+
+# Connects to an HTTP server on a separate thread, so that the caller
+# can do other work while the connection is being established.
+class _HTTPConnector(threading.Thread):
+    def __init__(self, net_loc, debug_level):
+        super(_HTTPConnector, self).__init__(daemon=True)
+        self.__net_loc = net_loc
+        self.__debug_level = debug_level
+        self.__conn = None
+        self.__err = None
+
+    def run(self):
+        try:
+            conn = HTTPConnection(self.__net_loc)
+            conn.set_debug_level(self.__debug_level)
+            conn.connect()
+            self.__conn = conn
+        except Exception as e:
+            self.__err = e
+
+    # Blocks until the connection attempt is complete. The caller
+    # becomes responsible for closing the returned connection.
+    # @return HTTPConnection, connected
+    # @raise the exception raised while connecting, if any
+    def take_connection(self):
+        self.join()
+        if self.__err:
+            raise self.__err
+        conn = self.__conn
+        self.__conn = None
+        return conn
+
+    # Closes the connection, unless it has been taken
+    def discard(self):
+        self.join()
+        if self.__conn:
+            self.__conn.close()
+            self.__conn = None
+
+
+# One-time-use crypto information from a "WWW-Authenticate" header. The
+# server may accept a nonce for more than one request, as long as the
+# nonce count increases.
+class _DigestChallenge(object):
+    def __init__(self, server_nonce, realm, qop):
+        self.server_nonce = server_nonce
+        self.realm = realm
+        self.qop = qop
+        self.__nonce_count = 0
+
+    # Not thread-safe, caller must synchronize
+    def get_next_nonce_count(self):
+        self.__nonce_count += 1
+        return self.__nonce_count
+
+# MD5 is used here only as required by HTTP digest authentication, not
+# for security. Where supported (python 3.9+), tell hashlib so, which
+# skips the FIPS policy check when constructing the hash object.
+try:
+    hashlib.md5(b'', usedforsecurity=False)
+    def _md5hex(data):
+        return hashlib.md5(data, usedforsecurity=False).hexdigest()
+except TypeError:
+    def _md5hex(data):
+        return hashlib.md5(data).hexdigest()
@@ -95,8 +95,3 @@ class Breakpoint(object):
 
     def __check_debug(self, min_level):
         return max(global_config.debug_level, self.__debug_level) >= min_level
-
-
-import sys
-def do_exit(errCode, msg=None):
-    sys.modules['__main__'].do_exit(errCode, msg)
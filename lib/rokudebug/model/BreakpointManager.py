@@ -155,8 +155,3 @@ class BreakpointManager(object):
         s += '#breakpoints={}'.format(len(self.breakpoints))
         s += ']'
         return s
-
-
-import sys
-def do_exit(errCode, msg=None):
-    sys.modules['__main__'].do_exit(errCode, msg)
@@ -33,6 +33,15 @@ import datetime, os, sys
 global_config = getattr(sys.modules['__main__'], 'global_config', None)
 assert global_config
 
+# How dump_bytes() shows each byte value: printable ASCII as itself,
+# anything else escaped as hex. An escaped newline also ends the line.
+_PRINTABLE_BYTES = bytes(b for b in range(128) if chr(b).isprintable())
+_NEWLINE_BYTE = ord('\n')
+_DUMP_BYTE_STRS = tuple(
+    chr(b) if (b in _PRINTABLE_BYTES) else
+        ('\\{:#x}\n' if b == _NEWLINE_BYTE else '\\{:#x}').format(b)
+    for b in range(256))
+
 # return enum name or None if enum_value is None or not an enum
 def get_enum_name(enum_value):
     if enum_value == None:
@@ -55,33 +64,24 @@ def revision_timestamp_to_str(timestamp, include_int_value=False):
         rev_time_str = '{}({})'.format(timestamp, timestamp_str)
     return rev_time_str
 
+# Builds the whole dump and writes it once
 def dump_bytes(bytes, label=None, forceEol=False, maxLen=None):
-    len = 0
-    atEol = False
+    truncated = maxLen and (len(bytes) >= maxLen)
+    shown = bytes[:maxLen] if truncated else bytes
+    parts = [_DUMP_BYTE_STRS[b] for b in shown]
+    if truncated:
+        parts.append('...')
     if label:
-        do_print('{}>>>>>'.format(label), end='')
-    for b in bytes:
-        if b <= 127:
-            s = str(bytearray([b]), 'ascii')
-            if s.isprintable():
-                b = None
-                do_print(s, end='')
-        if b != None:
-            do_print('\\{:#x}'.format(b), end='')
-            if b == ord('\n'):
-                atEol = True
-                do_print()
-            else:
-                atEol = False
-        len += 1
-        if maxLen and (len >= maxLen):
-            do_print('...', end='')
-            break
+        parts.insert(0, '{}>>>>>'.format(label))
+        parts.append('<<<<<{}\n'.format(label))
 
-    if label:
-        do_print('<<<<<{}'.format(label))
+    # Printable bytes do not change whether the dump is at the end of
+    # a line, only the last escaped byte does
+    escaped = shown.translate(None, _PRINTABLE_BYTES)
+    atEol = bool(escaped) and (escaped[-1] == _NEWLINE_BYTE)
     if forceEol and not atEol:
-        do_print()
+        parts.append('\n')
+    do_print(''.join(parts), end='')
 
 # Stdout may have been directed to stream that does not flush; this
 # adds explicit flushing
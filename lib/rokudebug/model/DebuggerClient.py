@@ -29,7 +29,7 @@
 # those identifiers.
 
 import abc # abstract base class
-import socket, sys, threading, time, traceback
+import queue, socket, sys, threading, time, traceback
 
 from .DebuggerRequest import CmdCode
 from .DebuggerResponse import ErrCode
@@ -40,12 +40,22 @@ from .DebugUtils import do_exit, do_print
 from .ProtocolVersion import ProtocolFeature
 from .ProtocolVersion import ProtocolVersion
 from .StackReferenceIDManager import StackReferenceIDManager
+from .StreamReader import StreamReader
 from .StreamUtils import StreamUtils
 from .Verbosity import Verbosity
 
 global_config = getattr(sys.modules['__main__'], 'global_config', None)
 assert global_config    # verbosity, global debug_level, do_exit()
 
+# SystemExit only exits the current thread, so call it by its real name
+ThreadExit = SystemExit
+
+# Nothing calls task_done() or join() on the send queue (python 3.7+)
+_SendQueue = getattr(queue, 'SimpleQueue', queue.Queue)
+
+# Max time shutdown() waits for queued requests to be written
+_SENDER_DRAIN_TIMEOUT_SECONDS = 2.0
+
 DEBUGGER_PORT = 8081
 DEBUGGER_CONNECTION_TIMEOUT_SECONDS = 60
 DEBUGGER_MAGIC = 0x0067756265647362 # 64-bit = [b'bsdebug\0' little-endian]
@@ -85,6 +95,13 @@ class AbstractDebuggerClient(abc.ABC):
     def has_pending_request(self) -> bool:
         return False
 
+    # Errors that stopped a thread sending data to, or receiving data
+    # from, the debuggee
+    # @return (exception, traceback_str) or None
+    @abc.abstractmethod
+    def get_listener_error(self):
+        return None
+
     @abc.abstractmethod
     def shutdown(self) -> None:
         pass
@@ -116,6 +133,7 @@ class DebuggerClient(AbstractDebuggerClient):
         self.__features = frozenset()   # created during handshake
         self.__io_listener = None
         self.__control_socket = None
+        self.__control_reader = None    # StreamReader, used by the listener
         self.__next_request_id = 1 # start with 1 b/c 0 is confused with None
         self.__target_ip_addr = target_ip_addr
         self.__request_id_lock = threading.Lock()
@@ -124,6 +142,13 @@ class DebuggerClient(AbstractDebuggerClient):
         self.__control_listener = None  # populated during handshake
         self.__save_target_output = False
 
+        # Requests are written to the control socket on a separate thread,
+        # so that a slow connection does not block the caller. The queue
+        # preserves the order in which requests were sent.
+        self.__send_queue = _SendQueue()    # DebuggerRequest or None to exit
+        self.__sender_thread = None         # started after the handshake
+        self.__sender_errors = _SendQueue() # (exception, traceback str)
+
         # Cached data
         self.__cached_threads = None           # [thr_idx] -> Latest THREADS response
         self.__cached_thread_stacktraces = None     # [thr_idx] -> Latest STACKTRACE reponse
@@ -285,9 +310,15 @@ class DebuggerClient(AbstractDebuggerClient):
         sock.settimeout(1e+6) # normal state is blocked waiting for event
         self.__control_socket = sock
         self.__do_handshake()
+        # The handshake reads exactly its own bytes, so everything after
+        # it can go through the buffered reader
+        self.__control_reader = StreamReader(sock)
         self.__control_listener = DebuggerControlListener(self,
             self.__general_update_handler, self.__io_update_handler,
             suppress_connection_errors=self.__suppress_connection_errors)
+        self.__sender_thread = threading.Thread(target=self.__run_sender,
+            name='DebuggerRequestSender', daemon=True)
+        self.__sender_thread.start()
 
         print('info: connected to debug target, protocol version={}'.format(
             self.protocol_version.to_user_str(include_software_revision=True)))
@@ -360,6 +391,15 @@ class DebuggerClient(AbstractDebuggerClient):
                 request.cmd_code == CmdCode.EXIT_CHANNEL:
             self.__invalidate_thread_cache()
 
+        if self.__sender_thread:
+            self.__send_queue.put(request)
+        else:
+            self.__send_now(request)
+
+    def has_pending_request(self):
+        return self.__control_listener.has_pending_request()
+
+    def __send_now(self, request):
         with self.__lock:
             suppress = self.__suppress_connection_errors
         try:
@@ -371,23 +411,67 @@ class DebuggerClient(AbstractDebuggerClient):
             if not suppress:
                 raise
 
-    def has_pending_request(self):
-        return self.__control_listener.has_pending_request()
+    # Body of the sender thread. Exits when None is dequeued.
+    def __run_sender(self):
+        try:
+            while True:
+                request = self.__send_queue.get()
+                if request is None:
+                    break
+                self.__send_now(request)
+        except ThreadExit: raise
+        # The sender stops on any error, which is left to the main thread
+        # to act upon. See get_listener_error()
+        except OSError as e:
+            # __send_now() only raises connection errors when not suppressed
+            self.__report_sender_error(OSError(
+                'Could not send request to debug target: {}'.format(e)), None)
+        except Exception as e:
+            self.__report_sender_error(e, traceback.format_exc())
+        if self.__check_debug(2):
+            print('debug: dclient: sender thread exiting')
+
+    # Called on the sender thread
+    def __report_sender_error(self, exception, traceback_str):
+        if self.__check_debug(2):
+            print('debug: dclient: sender thread failed: {}'.format(exception))
+        self.__sender_errors.put((exception, traceback_str))
+        global_config.wake_main_thread()
+
+    # Lets requests already queued (e.g., a final EXIT_CHANNEL) reach
+    # the target before the socket is closed
+    def __stop_sender(self):
+        thread = self.__sender_thread
+        if not thread:
+            return
+        self.__sender_thread = None
+        self.__send_queue.put(None)
+        if thread is not threading.current_thread():
+            thread.join(_SENDER_DRAIN_TIMEOUT_SECONDS)
 
     def get_pending_request_count(self):
         return self.__control_listener.get_pending_request_count()
 
+    def get_listener_error(self):
+        try:
+            return self.__sender_errors.get_nowait()
+        except queue.Empty:
+            pass
+        if not self.__control_listener:
+            return None
+        return self.__control_listener.get_error()
+
     ####################################################################
     # RECEIVE DATA
     ####################################################################
 
     # @raise EOFError on EOF
     def recv_double(self, counter):
-        return StreamUtils.read_ieee754binary64_le(self.__control_socket, counter)
+        return self.__control_reader.read_ieee754binary64_le(counter)
 
     # @raise EOFError on EOF
     def recv_float(self, counter):
-        return StreamUtils.read_ieee754binary32_le(self.__control_socket, counter)
+        return self.__control_reader.read_ieee754binary32_le(counter)
 
     # @raise EOFError on EOF
     def recv_bool(self, counter):
@@ -395,23 +479,33 @@ class DebuggerClient(AbstractDebuggerClient):
 
     # @raise EOFError on EOF
     def recv_uint8(self, counter):
-        return StreamUtils.read_uint8(self.__control_socket, counter)
+        return self.__control_reader.read_uint8(counter)
 
     # @raise EOFError on EOF
     def recv_int32(self, counter):
-        return StreamUtils.read_int32_le(self.__control_socket, counter)
+        return self.__control_reader.read_int32_le(counter)
 
     # @raise EOFError on EOF
     def recv_uint32(self, counter):
-        return StreamUtils.read_uint32_le(self.__control_socket, counter)
+        return self.__control_reader.read_uint32_le(counter)
+
+    # @raise EOFError on EOF
+    # @return tuple of count uint32 values
+    def recv_uint32s(self, count, counter):
+        return self.__control_reader.read_uint32s_le(count, counter)
+
+    # @raise EOFError on EOF
+    # @return tuple (int32, uint8)
+    def recv_int32_uint8(self, counter):
+        return self.__control_reader.read_int32_uint8_le(counter)
 
     # @raise EOFError on EOF
     def recv_int64(self, counter):
-        return StreamUtils.read_int64_le(self.__control_socket, counter)
+        return self.__control_reader.read_int64_le(counter)
 
     # @raise EOFError on EOF
     def recv_str(self, counter):
-        s = StreamUtils.read_utf8(self.__control_socket, counter)
+        s = self.__control_reader.read_utf8(counter)
         if self.__check_debug(10):
             print('debug: dclient.recv_str() s={}'.format(s))
         return s
@@ -454,7 +548,10 @@ class DebuggerClient(AbstractDebuggerClient):
     def shutdown(self):
         if self.__check_debug(2):
             print('debug: dclient: shutdown()')
+        self.__stop_sender()
         with self.__lock:
+            if self.__control_listener:
+                self.__control_listener.stop()
             if self.__control_socket:
                 if self.__check_debug(2):
                     print('debug: dclient: closing control socket')
@@ -32,11 +32,14 @@ from .DebuggerResponse import DebuggerUpdate
 from .DebuggerResponse import UpdateType
 from .Verbosity import Verbosity
 
-import sys, threading, traceback
+import collections, queue, sys, threading, traceback
 
 # SystemExit only exits the current thread, so call it by its real name
 ThreadExit = SystemExit
 
+# SimpleQueue exists in python 3.7+
+_ErrorQueue = getattr(queue, 'SimpleQueue', queue.Queue)
+
 global_config = getattr(sys.modules['__main__'], 'global_config', None)
 assert global_config    # verbosity, global debug_level
 
@@ -45,38 +48,28 @@ UINT32_NUM_BYTES = 4
 UINT64_NUM_BYTES = 8
 
 class _PendingRequest(object):
+    __slots__ = ('request', 'allow_update', 'allowed_update_types')
+
     def __init__(self, request, allow_update, allowed_update_types):
-        if allow_update:
-            assert allowed_update_types != None
-        else:
-            assert allowed_update_types == None
+        assert bool(allow_update) == (allowed_update_types != None)
         self.request = request
         self.allow_update =  allow_update
-        self.allowed_update_types = allowed_update_types
-
-    def __str__(self):
-        return self.__repr__()
+        # frozenset: an entry is queued at most once per update type
+        self.allowed_update_types = None
+        if allowed_update_types != None:
+            self.allowed_update_types = frozenset(allowed_update_types)
 
     def __repr__(self):
-        s = '_PendingRequest['
+        parts = []
         if self.allow_update:
-            if s[len(s)-1] != '[':
-                s += ','
-            s = s + 'allowupdate'
+            parts.append('allowupdate')
         if self.allowed_update_types != None:
-            if s[len(s)-1] != '[':
-                s += ','
-            s += 'allowedupdatetypes=['
-            for one_type in self.allowed_update_types:
-                if s[len(s)-1] != '[':
-                    s += ','
-                s += one_type.name
-            s += ']'
-        if s[len(s)-1] != '[':
-            s += ','
-        s += 'request={}'.format(self.request)
-        s += ']'
-        return s
+            parts.append('allowedupdatetypes=[{}]'.format(
+                ','.join(t.name for t in sorted(self.allowed_update_types))))
+        parts.append('request={}'.format(self.request))
+        return '_PendingRequest[{}]'.format(','.join(parts))
+
+    __str__ = __repr__
 
 
 # Uses a separate thread to listen to the debugger control
@@ -94,12 +87,24 @@ class DebuggerControlListener(object):
     def __init__(self, debugger_client, general_update_handler,
                     io_update_handler, suppress_connection_errors=False):
         self._debug_level = 0
+        # Checked for every message. global_config.debug_level is set
+        # before the connection is made, so it is resolved once.
+        self.__effective_debug_level = max(global_config.debug_level,
+                                           self._debug_level)
+        assert global_config.debug_level >= 0 and self._debug_level >= 0
         self._debugger_client = debugger_client
         self._general_update_handler = general_update_handler
         self._io_update_handler = io_update_handler
 
         # private
-        self.__pending_requests = []    # list of _PendingRequest
+        # Every inbound message looks up its request, so pending requests
+        # are indexed rather than kept in a list. Entries that allow
+        # updates are found by update type, all others by request ID.
+        self.__pending_by_id = {}           # request_id -> _PendingRequest
+        self.__pending_by_update_type = {}  # UpdateType -> deque of _PendingRequest
+        self.__pending_count = 0
+        self._stop_event = threading.Event()    # set by stop()
+        self.__errors = _ErrorQueue()   # (exception, traceback str) from thread
         self.__thread = _ListenerThread(self, suppress_connection_errors)
         self.__pending_lock = threading.Lock()
 
@@ -114,60 +119,100 @@ class DebuggerControlListener(object):
     def get_suppress_connection_errors(self) -> bool:
         return self.__thread.get_suppress_connection_errors()
 
+    # Stop processing updates. An update that is being read when this is
+    # called is discarded and errors from the closing connection are not
+    # reported. The caller closes the socket, which unblocks a pending
+    # read. May be called from any thread.
+    def stop(self) -> None:
+        if self.__check_debug(2):
+            print('debug: ctl_lis: stop()')
+        self._stop_event.set()
+        self.__thread.set_suppress_connection_errors(True)
+
+    # Errors that terminated the listener thread are not acted upon by
+    # that thread, they are queued here for the main thread, which
+    # decides whether to exit.
+    # @return (exception, traceback_str) or None if there are no errors.
+    #         traceback_str is None if the thread ended without an
+    #         uncaught exception, in which case exception describes why
+    #         (e.g., EOFError), or is None if the reason is unknown
+    def get_error(self):
+        try:
+            return self.__errors.get_nowait()
+        except queue.Empty:
+            return None
+
+    # Called on the listener thread, which stops after this returns
+    def _report_error(self, exception, traceback_str) -> None:
+        self.__errors.put((exception, traceback_str))
+        self._stop_event.set()
+        global_config.wake_main_thread()
+
+    # Reading an int attribute or a single dict lookup is atomic, so
+    # queries do not take __pending_lock; only mutations do.
     def has_pending_request(self):
-        with self.__pending_lock:
-            return (len(self.__pending_requests) > 0)
+        return (self.__pending_count > 0)
 
     def get_pending_request_count(self):
-        with self.__pending_lock:
-            return len(self.__pending_requests)
+        return self.__pending_count
 
     # A pending request is any request that is waiting for a response
     # from the debugging target.
     def add_pending_request(self, request, allow_update=False,
                             allowed_update_types=None):
+        assert request
+        assert request.request_id
+        entry = _PendingRequest(request, allow_update, allowed_update_types)
         with self.__pending_lock:
-            assert request
-            assert request.request_id
-            entry = _PendingRequest(request, allow_update, allowed_update_types)
-            self.__pending_requests.append(entry)
-            if self.__check_debug(3):
-                print('debug: ctl_lis: add pending request, count={},req={}'.format(
-                    len(self.__pending_requests), entry))
+            if allow_update:
+                by_type = self.__pending_by_update_type
+                for one_type in allowed_update_types:
+                    if one_type not in by_type:
+                        by_type[one_type] = collections.deque()
+                    by_type[one_type].append(entry)
+            else:
+                assert request.request_id not in self.__pending_by_id
+                self.__pending_by_id[request.request_id] = entry
+            self.__pending_count += 1
+            count = self.__pending_count
+        if self.__check_debug(3):
+            print('debug: ctl_lis: add pending request, count={},req={}'.format(
+                count, entry))
 
     def get_pending_request(self, request_id, remove=False):
-        pending_list = self.__pending_requests
         request = None
-        with self.__pending_lock:
-            for i in range(len(pending_list)):
-                one_pending = pending_list[i]
-                if one_pending.request.request_id == request_id:
-                    request = one_pending.request
-                    if remove:
-                        del pending_list[i]
-                    break
+        if remove:
+            with self.__pending_lock:
+                entry = self.__pending_by_id.pop(request_id, None)
+                if entry:
+                    self.__pending_count -= 1
+        else:
+            entry = self.__pending_by_id.get(request_id, None)
+        if entry:
+            request = entry.request
         if self.__check_debug(3):
             print('debug: ctl_lis: find pending by ID({})->{}'.format(
                                             request_id, request))
         return request
 
+    # @param update_type UpdateType, as decoded by read_update()
     def get_pending_request_by_update_type(self, update_type, remove=False):
-        assert update_type
-        assert isinstance(update_type, UpdateType)
-        pending_list = self.__pending_requests
+        by_type = self.__pending_by_update_type
         request = None
         with self.__pending_lock:
-            for i in range(len(pending_list)):
-                one_pending = pending_list[i]
-                if one_pending.allowed_update_types:
-                    for one_type in one_pending.allowed_update_types:
-                        if one_type == update_type:
-                            request = one_pending.request
-                            if remove:
-                                del pending_list[i]
-                            break
-                        if request:
-                            break
+            entries = by_type.get(update_type, None)
+            if entries:
+                # Oldest first
+                entry = entries[0]
+                request = entry.request
+                if remove:
+                    # The entry is queued under each of its allowed types
+                    for one_type in entry.allowed_update_types:
+                        one_entries = by_type[one_type]
+                        one_entries.remove(entry)
+                        if not one_entries:
+                            del by_type[one_type]
+                    self.__pending_count -= 1
 
         if self.__check_debug(3):
             print('debug: ctl_lis: find pending by update_type({})->{}'.format(
@@ -175,9 +220,7 @@ class DebuggerControlListener(object):
         return request
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self.__effective_debug_level >= min_level
 
 #END class DebuggerControlListener
 
@@ -188,6 +231,8 @@ class _ListenerThread(threading.Thread):
         super(_ListenerThread, self).__init__(daemon=True)
         self.name = 'DebuggerListener'      # Used by superclass
         self._debug_level = 0
+        self.__effective_debug_level = max(global_config.debug_level,
+                                           self._debug_level)
         self.__listener = listener
 
         # members below are protected with __lock
@@ -203,48 +248,65 @@ class _ListenerThread(threading.Thread):
             return self.__suppress_connection_errors
 
     def run(self):
+        stop_event = self.__listener._stop_event
+        reason = None
         try:
-            self.__run_impl()
+            reason = self.__run_impl()
         except Exception as e:
             if self.__check_debug(2):
                 print('debug: ctl_lis: control connection closed: {}'.format(e))
+            if stop_event.is_set():
+                # Reading from a socket that is being closed may fail
+                # in any number of ways
+                return
             is_connection_err = isinstance(e, OSError)
             if not is_connection_err or not self.get_suppress_connection_errors():
                 # Don't show connection exceptions when the are suppressed
                 # Always show other exceptions
-                traceback.print_exc(file=sys.stderr)
-                global_config.do_exit(1, 'INTERNAL ERR: uncaught exception')
+                self.__listener._report_error(e, traceback.format_exc())
+                return
 
-        if not self.get_suppress_connection_errors():
+        if not self.get_suppress_connection_errors() and not stop_event.is_set():
             if self.__check_debug(2):
                 print('debug: unexpected termination of control listener')
-            global_config.do_exit(1, 'INTERNAL ERROR: '\
-                    'unexpected termination of control listener')
+            self.__listener._report_error(reason, None)
 
-    def __run_impl(self) -> None:
+    # @return exception describing why the connection ended, or None
+    def __run_impl(self):
         if self.__check_debug(2):
             print('debug: ctl_lis: thread running')
         listener = self.__listener
         dclient = listener._debugger_client
         general_update_handler = listener._general_update_handler
         io_update_handler = listener._io_update_handler
+        # Loop-invariant lookups, bound once for the life of the connection
+        read_update = DebuggerUpdate.read_update
+        connect_io_port = UpdateType.CONNECT_IO_PORT
+        stop_event = listener._stop_event
+        trace_each = self.__check_debug(5)
+        reason = None
         done = False
         while not done:
-            update = DebuggerUpdate.read_update(dclient, listener)
+            update = read_update(dclient, listener)
+            if stop_event.is_set():
+                if self.__check_debug(2):
+                    print('debug: ctl_lis: stopped')
+                break
             if not update:
                 if self.__check_debug(2):
-                    print('debug: ctl_lis: EOF on socket, suppressioerrs={}',
-                          self.__suppress_connection_errors)
+                    print('debug: ctl_lis: EOF on socket, suppressioerrs={}'.format(
+                          self.__suppress_connection_errors))
                 if not self.__suppress_connection_errors:
                     if global_config.verbosity >= Verbosity.NORMAL:
                         print('info: unexpected EOF on control socket')
-                        global_config.do_exit(1, 'Unexpected EOF on control socket')
+                    # run() reports this, the main thread decides to exit
+                    reason = EOFError('Unexpected EOF on control socket')
                 done = True
                 break
 
-            if self.__check_debug(5):
+            if trace_each:
                 print('debug: ctl_lis: recvd msg: {}'.format(update))
-            if update.update_type == UpdateType.CONNECT_IO_PORT:
+            if update.update_type == connect_io_port:
                 done = not io_update_handler(update)
             else:
                 done = not general_update_handler(update)
@@ -255,8 +317,7 @@ class _ListenerThread(threading.Thread):
 
         if self.__check_debug(2):
             print('debug: ctl_lis: thread exiting')
+        return reason
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self.__effective_debug_level >= min_level
@@ -29,7 +29,7 @@
 # it difficult (but not impossible) for other classes to access
 # those identifiers.
 
-import socket, sys, threading, traceback
+import codecs, socket, sys, threading, traceback
 
 # SystemExit only exits the current thread, so call it by its real name
 ThreadExit = SystemExit
@@ -37,6 +37,8 @@ ThreadExit = SystemExit
 global_config = getattr(sys.modules['__main__'], 'global_config', None)
 assert global_config    # verbosity, global debug_level
 
+_READ_BUFFER_SIZE = 65536
+
 # Uses a separate thread to listen to the debugger's I/O port,
 # to retrieve output from the running script and forward it
 # to out_file.
@@ -78,6 +80,9 @@ class _IOListenerThread(threading.Thread):
 
         # Saved lines. These are normally only requested when tests
         # are being run, so that the tests can examine the target's output.
+        # Tests must see every line, so this is not bounded: it is only
+        # filled while saving is enabled, and is drained by each call to
+        # get_saved_lines().
         self.__save_output_lock = threading.Lock()
         self.__save_output = False
         self.__save_buffer = ''
@@ -109,15 +114,20 @@ class _IOListenerThread(threading.Thread):
             if self.__check_debug(2):
                 print('debug:io_lis: connected to IO {}:{}'.format(
                     self.__host,self.__port))
+            # read1() returns whatever is available, after at most one
+            # recv() into the reader's buffer
+            reader = self.__socket.makefile('rb', buffering=_READ_BUFFER_SIZE)
+            # Multi-byte characters may be split across reads
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
             done = False
             while not done:
                 try:
-                    buf = self.__socket.recv(1)
-                    if buf and len(buf):
-                        b = buf[0]
-                        c = chr(b)
-                        print(c, file=self.__out_file, end='')
-                        self.__add_char_to_saved(c)
+                    buf = reader.read1(_READ_BUFFER_SIZE)
+                    if buf:
+                        text = decoder.decode(buf)
+                        if text:
+                            self.__out_file.write(text)
+                            self.__add_text_to_saved(text)
 
                     else:
                         # EOF
@@ -125,7 +135,10 @@ class _IOListenerThread(threading.Thread):
                         if self.__check_debug(2):
                             print('debug:io_lis: EOF on target I/O stream')
                 except:
-                    pass
+                    # disconnect() may close the socket during a read
+                    if not self.__socket:
+                        done = True
+            reader.close()
 
         except ThreadExit: raise
         except:     # yes, catch EVERYTHING
@@ -142,15 +155,17 @@ class _IOListenerThread(threading.Thread):
             self.__socket.close()
             self.__socket = None
 
-    def __add_char_to_saved(self, c) -> None:
+    def __add_text_to_saved(self, text) -> None:
         with self.__save_output_lock:
             if not self.__save_output:
                 return None
-            if c == '\n':
-                self.__saved_lines.append(self.__save_buffer)
-                self.__save_buffer = ''
+            lines = text.split('\n')
+            if len(lines) > 1:
+                lines[0] = self.__save_buffer + lines[0]
+                self.__saved_lines.extend(lines[:-1])
+                self.__save_buffer = lines[-1]
             else:
-                self.__save_buffer += c
+                self.__save_buffer += text
         return None
 
     def __check_debug(self, min_level):
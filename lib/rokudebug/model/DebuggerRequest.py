@@ -673,7 +673,3 @@ class DebuggerRequest_Execute(DebuggerRequest):
         wrcnt += dc.send_uint(self.frame_index)
         wrcnt += dc.send_str(self.source_code)
         self._debug_command_sent(debugger_client, wrcnt, validate);
-
-
-def do_exit(errCode, msg=None):
-    sys.modules['__main__'].do_exit(errCode, msg)
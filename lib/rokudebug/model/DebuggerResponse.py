@@ -183,6 +183,14 @@ class ProtocolError(enum.IntEnum):
     def __str__(self):
         return repr(self)
 
+# Enum members by their raw protocol values. A dict lookup is much cheaper
+# than calling the enum class, and these are decoded for every message.
+# Unknown values raise KeyError.
+_ERR_CODES = {int(e): e for e in ErrCode}
+_UPDATE_TYPES = {int(e): e for e in UpdateType}
+_THREAD_STOP_REASONS = {int(e): e for e in ThreadStopReason}
+_VARIABLE_TYPES = {int(e): e for e in VariableType}
+
 # Set of types that are always containers (those that have sub-elements)
 _g_container_types = {
     VariableType.AA,
@@ -195,14 +203,55 @@ _g_maybe_container_types = {
     VariableType.SUBTYPED_OBJECT
 }
 
+# Readers for the types whose value is stored in DebuggerVariable.value,
+# called as receive(debugger_client, io_counter). Object and interface
+# types have a subtype instead, and containers do not have a value.
+_VALUE_RECEIVERS = {
+    VariableType.BOOLEAN: lambda d, c: bool(d.recv_uint8(c)),
+    VariableType.DOUBLE: lambda d, c: d.recv_double(c),
+    VariableType.FLOAT: lambda d, c: d.recv_float(c),
+    VariableType.FUNCTION: lambda d, c: d.recv_str(c),
+    VariableType.INTEGER: lambda d, c: d.recv_int32(c),
+    VariableType.INVALID: lambda d, c: None,
+    VariableType.LONG_INTEGER: lambda d, c: d.recv_long(c),
+    VariableType.STRING: lambda d, c: d.recv_str(c),
+    VariableType.SUBROUTINE: lambda d, c: d.recv_str(c),
+}
+
+# Names shown to the user, for the types whose name does not depend on
+# the variable. See DebuggerVariable.get_type_name_for_user().
+_TYPE_NAMES_FOR_USER = {
+    VariableType.AA: 'roAssociativeArray',
+    VariableType.ARRAY: 'roArray',
+    VariableType.BOOLEAN: 'Boolean',
+    VariableType.DOUBLE: 'Double',
+    VariableType.FLOAT: 'Float',
+    VariableType.FUNCTION: 'Function',
+    VariableType.INTEGER: 'Integer',
+    VariableType.INVALID: 'Invalid',
+    VariableType.LIST: 'roList',
+    VariableType.LONG_INTEGER: 'LongInteger',
+    VariableType.SUBROUTINE: 'Subroutine',
+    VariableType.UNINITIALIZED: '<uninitialized>',
+    VariableType.UNKNOWN: '<UNKNOWN>',
+}
+
 
 # A DebuggerUpdate can be an asynchronous event (e.g., script crashed)
 # or a response to a request. Unrequested updates have request_id==0,
 # and responses have request_id>0
 class DebuggerUpdate(object):
-    def __init__(self):
+    # Subclasses finish reading an update whose header was read into a
+    # plain DebuggerUpdate, and pass that as base so that its fields are
+    # taken over directly, rather than initialized and then copied.
+    # @param base DebuggerUpdate whose header fields are copied, or None
+    def __init__(self, base=None):
         super(DebuggerUpdate,self).__init__()
+        if base:
+            self._copy_from(base)
+            return
         self._debug_level = 0
+        self._resolve_debug_level()
         self.is_error = False
         self.err_code = None
         self.packet_length = None
@@ -227,8 +276,17 @@ class DebuggerUpdate(object):
         if self.packet_length != None:
             assert self.byte_read_count == self.packet_length
 
+    # Called whenever _debug_level is assigned. global_config.debug_level
+    # is final before the first update is read, so __check_debug() only
+    # needs to compare against the level resolved here.
+    def _resolve_debug_level(self):
+        self._effective_debug_level = max(global_config.debug_level,
+                                          self._debug_level)
+        assert global_config.debug_level >= 0 and self._debug_level >= 0
+
     def _copy_from(self, other):
         self._debug_level = other._debug_level
+        self._effective_debug_level = other._effective_debug_level
         self.packet_length = other.packet_length
         self.byte_read_count = other.byte_read_count
         self.is_error = other.is_error          # True if err_code != ErrCode.OK
@@ -278,13 +336,17 @@ class DebuggerUpdate(object):
 
         update = DebuggerUpdate()
         if debug_level >= 3:
-            print('debug: dresp: waiting for update...')
+            print('debug: dresp: waiting for update...')  # before blocking
+        # The fixed part of the header is read with one recv(). The
+        # update_type that follows when request_id is 0 is read later,
+        # because responses do not have it.
         if dclient.has_feature(ProtocolFeature.UPDATES_HAVE_PACKET_LENGTH):
-            update.packet_length = dclient.recv_uint32(update)
-        update.request_id = dclient.recv_uint32(update)
-        errInt = dclient.recv_uint32(update)
+            update.packet_length, update.request_id, errInt = \
+                dclient.recv_uint32s(3, update)
+        else:
+            update.request_id, errInt = dclient.recv_uint32s(2, update)
         try:
-            update.err_code = ErrCode(errInt)
+            update.err_code = _ERR_CODES[errInt]
             update.is_error = update.err_code != ErrCode.OK
         except Exception:
             do_exit(1, 'Unknown err code from target: {}'.format(errInt))
@@ -318,64 +380,22 @@ class DebuggerUpdate(object):
             # request type and/or update type.
             if request:
                 # Message is a response to a specific request
-                if request.cmd_code == CmdCode.ADD_BREAKPOINTS:
-                    update = DebuggerResponse_AddBreakpoints(dclient, update)
-                elif request.cmd_code == CmdCode.ADD_CONDITIONAL_BREAKPOINTS:
-                    update = DebuggerResponse_AddConditionalBreakpoints(dclient, update)
-                elif request.cmd_code == CmdCode.CONTINUE:
-                    pass
-                elif request.cmd_code == CmdCode.EXECUTE:
-                    update = DebuggerResponse_Execute(dclient, update)
-                elif request.cmd_code == CmdCode.EXIT_CHANNEL:
-                    pass
-                elif request.cmd_code == CmdCode.LIST_BREAKPOINTS:
-                    update = DebuggerResponse_ListBreakpoints(dclient, update)
-                elif request.cmd_code == CmdCode.REMOVE_BREAKPOINTS:
-                    update = DebuggerResponse_RemoveBreakpoints(dclient, update)
-                elif request.cmd_code == CmdCode.STACKTRACE:
-                    update = DebuggerResponse_Stacktrace(debugger_client, update)
-                elif request.cmd_code == CmdCode.STEP:
-                    pass
-                elif request.cmd_code == CmdCode.STOP:
-                    pass
-                elif request.cmd_code == CmdCode.THREADS:
-                    update = DebuggerResponse_Threads(debugger_client, update)
-                elif request.cmd_code == CmdCode.VARIABLES:
-                    update = DebuggerResponse_Variables(debugger_client, update)
-                else:
+                cmd_code = request.cmd_code
+                if cmd_code not in _RESPONSE_CLASSES:
                     do_exit(1, 'INTERNAL ERROR: response for unknown cmd_code={}'.format(
-                        request.cmd_code.to_user_str()))
+                        cmd_code.to_user_str()))
+                response_class = _RESPONSE_CLASSES[cmd_code]
+                if response_class:
+                    update = response_class(dclient, update)
             else:
                 # Message is an update without a request
                 update_type_raw = dclient.recv_uint32(update)
-                update.update_type = None
-                try:
-                    update.update_type = UpdateType(update_type_raw)
-                except Exception: pass
-                if update.update_type == UpdateType.ALL_THREADS_STOPPED:
-                    update = DebuggerUpdate_AllThreadsStopped(
-                        debugger_client, update)
-                elif update.update_type == UpdateType.BREAKPOINT_ERROR:
-                    update = DebuggerUpdate_BreakpointError(
-                        debugger_client, update)
-                elif update.update_type == UpdateType.BREAKPOINT_VERIFIED:
-                    update = DebuggerUpdate_BreakpointVerified(
-                        debugger_client, update)
-                elif update.update_type == UpdateType.COMPILE_ERROR:
-                    update = DebuggerUpdate_CompileError(
-                        debugger_client, update)
-                elif update.update_type == UpdateType.CONNECT_IO_PORT:
-                    update = DebuggerUpdate_ConnectIoPort(
-                        debugger_client, update)
-                elif update.update_type == UpdateType.THREAD_ATTACHED:
-                    update = DebuggerUpdate_ThreadAttached(
-                        debugger_client, update)
-                elif update.update_type == UpdateType.PROTOCOL_ERROR:
-                    update = DebuggerUpdate_ProtocolError(
-                        debugger_client, update)
-                else:
+                update_class = _UPDATE_CLASSES.get(update_type_raw, None)
+                if not update_class:
                     do_exit(1, 'Bad update_type from target: {}'.format(
                         update_type_raw))
+                update.update_type = _UPDATE_TYPES[update_type_raw]
+                update = update_class(dclient, update)
 
             # If protocol provides packet_length, read remainder
             if update.packet_length != None:
@@ -394,7 +414,7 @@ class DebuggerUpdate(object):
                 debugger_listener.get_pending_request_by_update_type(
                     update.update_type, True)
 
-        if global_config.debug_level >= 1: # 1 = validation
+        if debug_level >= 1: # 1 = validation
             DebuggerUpdate.__validate_update(update)
 
         if debug_level >= 2:
@@ -427,9 +447,7 @@ class DebuggerUpdate(object):
         return s
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 
 #END class DebuggerUpdate
@@ -453,9 +471,8 @@ class DebuggerResponse_Error(DebuggerUpdate):
         # If protocol version >= 3.1, additional data is expected:
         # uint32: err_flags
         # ... various data, depending upon the flags ...
-        super(DebuggerResponse_Error, self).__init__()
+        super(DebuggerResponse_Error, self).__init__(baseResponse)
         d = debugger_client
-        self._copy_from(baseResponse)
         self.err_flags = 0                      # 32-bit flags
         self.invalid_value_path_index = None
         self.missing_key_path_index = None
@@ -493,9 +510,7 @@ class DebuggerResponse_Error(DebuggerUpdate):
             assert self.invalid_value_path_index == None
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 
 # Response to ADD_BREAKPOINTS command
@@ -512,18 +527,18 @@ class DebuggerResponse_AddBreakpoints(DebuggerUpdate):
         #     uint32 err_code     # ErrorCode enum: OK if valid
         #     uint32 ignore_count   # only present if breakpoint_id is valid
         # ...breakpointInfo repeated numBreakpoint times
-        super(DebuggerResponse_AddBreakpoints, self).__init__()
+        super(DebuggerResponse_AddBreakpoints, self).__init__(baseResponse)
         d = debugger_client
-        self._copy_from(baseResponse)
         numBreakpoints = d.recv_uint32(self)
         if self.__check_debug(5):
             print('debug: dresp: reading {} breakpoint infos'.format(
                 numBreakpoints))
         self.breakpoints = list()
+        trace_each = self.__check_debug(3)
         for _ in range(numBreakpoints):
             brkpt_info = _BreakpointInfo(d, self)
             self.breakpoints.append(brkpt_info)
-            if self.__check_debug(3):
+            if trace_each:
                 print('debug: dresp: read breakinfo: {}'.format(brkpt_info))
 
     # parameters inside the response to __str__()
@@ -534,9 +549,7 @@ class DebuggerResponse_AddBreakpoints(DebuggerUpdate):
         return s
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 
 # Response to ADD_CONDITIONAL_BREAKPOINTS command
@@ -564,11 +577,11 @@ class DebuggerResponse_Execute(DebuggerUpdate):
         #   utf8z[num_runtime_errs] runtime_errs;
         #   uint32 num_other_errs;
         #   utf8z[num_other_errs] other_errs;
-        super(DebuggerResponse_Execute, self).__init__()
+        super(DebuggerResponse_Execute, self).__init__(baseResponse)
         d = debugger_client
-        self._copy_from(baseResponse)
 
         if d.has_feature(ProtocolFeature.EXECUTE_RETURNS_ERRORS):
+            trace_each = self.__check_debug(3)
             self.run_success = d.recv_bool(self)
             self.run_stop_code = d.recv_uint8(self)
 
@@ -580,7 +593,7 @@ class DebuggerResponse_Execute(DebuggerUpdate):
             self.compile_errors = list()
             for _ in range(errCount):
                 self.compile_errors.append(d.recv_str(self))
-                if self.__check_debug(3):
+                if trace_each:
                     print('debug: dresp: read compile err: {}'.format(self.compile_errors[-1]))
 
             # Runtime errors
@@ -591,7 +604,7 @@ class DebuggerResponse_Execute(DebuggerUpdate):
             self.runtime_errors = list()
             for _ in range(errCount):
                 self.runtime_errors.append(d.recv_str(self))
-                if self.__check_debug(3):
+                if trace_each:
                     print('debug: dresp: read runtime err: {}'.format(self.runtime_errors[-1]))
 
             # Other errors
@@ -602,7 +615,7 @@ class DebuggerResponse_Execute(DebuggerUpdate):
             self.other_errors = list()
             for _ in range(errCount):
                 self.other_errors.append(d.recv_str(self))
-                if self.__check_debug(3):
+                if trace_each:
                     print('debug: dresp: read other err: {}'.format(self.other_errors[-1]))
 
     # parameters inside the response to __str__()
@@ -614,9 +627,7 @@ class DebuggerResponse_Execute(DebuggerUpdate):
         return s
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 #END class DebuggerResponse_Execute
 
@@ -635,18 +646,18 @@ class DebuggerResponse_ListBreakpoints(DebuggerUpdate):
         #     uint32 err_code
         #     uint32 ignore_count    # only present if breakpoint_id is valid
         #     breakpoint_id,err_code,ignore_count repeated num_breakpoints times
-        super(DebuggerResponse_ListBreakpoints, self).__init__()
+        super(DebuggerResponse_ListBreakpoints, self).__init__(baseResponse)
         if self.__check_debug(5):
             print('debug: dresp: reading list breakpoints response')
         d = debugger_client
-        self._copy_from(baseResponse)
         self.breakpoint_infos = list()
         num_breakpoints = debugger_client.recv_uint32(self)
         if self.__check_debug(5):
             print('debug: dresp: reading {} breakpoints'.format(num_breakpoints))
+        trace_each = self.__check_debug(5)
         for _ in range(num_breakpoints):   # pylint: disable=unused-variable
             info = _BreakpointInfo(d, self)
-            if self.__check_debug(5):
+            if trace_each:
                 print('debug: dresp: read breakpoint info: {}'.format(info))
             self.breakpoint_infos.append(info)
 
@@ -665,9 +676,7 @@ class DebuggerResponse_ListBreakpoints(DebuggerUpdate):
             print('    {}: {}'.format(i_breakpoint, info), file=out)
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 # END class DebuggerResponse_ListBreakpoints
 
@@ -686,18 +695,18 @@ class DebuggerResponse_RemoveBreakpoints(DebuggerUpdate):
         #     uint32 err_code
         #     uint32 ignore_count    # only present if breakpoint_id is valid
         #     breakpoint_id,err_code,ignore_count repeated num_breakpoints times
-        super(DebuggerResponse_RemoveBreakpoints, self).__init__()
+        super(DebuggerResponse_RemoveBreakpoints, self).__init__(baseResponse)
         if self.__check_debug(5):
             print('debug: dresp: reading remove breakpoints response')
         d = debugger_client
-        self._copy_from(baseResponse)
         self.breakpoint_infos = list()
         num_breakpoints = debugger_client.recv_uint32(self)
         if self.__check_debug(5):
             print('debug: dresp: reading {} breakpoints'.format(num_breakpoints))
+        trace_each = self.__check_debug(5)
         for _ in range(num_breakpoints):   # pylint: disable=unused-variable
             info = _BreakpointInfo(d, self)
-            if self.__check_debug(5):
+            if trace_each:
                 print('debug: dresp: read breakpoint info: {}'.format(info))
             self.breakpoint_infos.append(info)
 
@@ -723,19 +732,19 @@ class DebuggerResponse_RemoveBreakpoints(DebuggerUpdate):
             print('    {}: {}'.format(i_breakpoint, info), file=out)
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 # END class DebuggerResponse_RemoveBreakpoints
 
 class _BreakpointInfo(object):
+    __slots__ = ('remote_id', 'ignore_count', 'err_code', 'is_error')
+
     def __init__(self, debugger_client, io_counter):
         d = debugger_client
         self.remote_id = d.recv_uint32(io_counter)
         raw_err_code = d.recv_uint32(io_counter)
         try:
-            self.err_code = ErrCode(raw_err_code)
+            self.err_code = _ERR_CODES[raw_err_code]
             self.is_error = self.err_code != ErrCode.OK
         except Exception:
             do_exit(1, 'Unknown err_code from target: remote_id={}, err_code={}'.\
@@ -771,27 +780,24 @@ class DebuggerResponse_Stacktrace(DebuggerUpdate):
         #     utf8   functionName
         #     utf8   codeSnippet
         # [ stack frame info repeated numStackFrames times ]
-        super(DebuggerResponse_Stacktrace, self).__init__()
+        super(DebuggerResponse_Stacktrace, self).__init__(baseResponse)
         self.frames = []
 
         d = debugger_client
-        self._copy_from(baseResponse)
         numFrames = d.recv_uint32(self)
         if self.__check_debug(5):
             print('debug: dresp: reading {} stack frames'.format(numFrames))
-        for _ in range(numFrames):
+        trace_each = self.__check_debug(3)
+        self.frames = [None] * numFrames
+        for i_frame in range(numFrames):
             frame = DebuggerStackFrame(d, self)
-            self.frames.append(frame)
-            if self.__check_debug(3):
+            self.frames[i_frame] = frame
+            if trace_each:
                 print('debug: dresp: read frame: {}'.format(frame))
         # The debugger protocol 1.x specifies the stack frames
         # come in reverse order (last function...first function)
         # reverse 'em
-        for i_frame in range(int(numFrames / 2)):
-            pair_idx = numFrames - i_frame - 1
-            tmp = self.frames[i_frame]
-            self.frames[i_frame] = self.frames[pair_idx]
-            self.frames[pair_idx] = tmp
+        self.frames.reverse()
 
     # parameters inside the response to __str__()
     def str_params(self):
@@ -815,16 +821,18 @@ class DebuggerResponse_Stacktrace(DebuggerUpdate):
     def get_num_frames(self):
         return len(self.frames)
 
+    # frames[0] is the first function called, frames[-1] is the last
+    # @return the stored list of DebuggerStackFrame, not a copy
     def get_frames(self):
         return self.frames
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 
 class DebuggerStackFrame(object):
+    __slots__ = ('line_num', 'func_name', 'file_path')
+
     def __init__(self, debugger_client, io_counter):
         d = debugger_client
         self.line_num = d.recv_uint32(io_counter)
@@ -863,6 +871,9 @@ class _ThreadInfoFlags(enum.IntEnum):
     def __str__(self):
         return repr(self)
 
+# Plain int masks, for testing the flags of every thread received
+_THREAD_INFO_IS_PRIMARY = int(_ThreadInfoFlags.IS_PRIMARY)
+
 
 # Response to the 'threads' command
 class DebuggerResponse_Threads(DebuggerUpdate):
@@ -879,22 +890,24 @@ class DebuggerResponse_Threads(DebuggerUpdate):
         # utf8   file_name
         # utf8   code_snippet
         # [ thread info repeated num_threads times ]
-        super(DebuggerResponse_Threads, self).__init__()
+        super(DebuggerResponse_Threads, self).__init__(baseResponse)
         self._debug_level = 0
+        self._resolve_debug_level()
         if self.__check_debug(5):
             print('debug: dresp: reading threads response')
         d = debugger_client
-        self._copy_from(baseResponse)
         self.threads = []
         num_threads = debugger_client.recv_uint32(self)
         if self.__check_debug(5):
             print('debug: dresp: reading {} threads'.format(num_threads))
         primary_count = 0
-        for i_thread in range(num_threads):   # pylint: disable=unused-variable
+        trace_each = self.__check_debug(5)
+        self.threads = [None] * num_threads
+        for i_thread in range(num_threads):
             thread_info = ThreadInfo(d, self)
-            if self.__check_debug(5):
+            if trace_each:
                 print('debug: dresp: read thrinfo: {}'.format(thread_info))
-            self.threads.append(thread_info)
+            self.threads[i_thread] = thread_info
             if thread_info.is_primary:
                 primary_count += 1
         if self.__check_debug(1):
@@ -931,22 +944,23 @@ class DebuggerResponse_Threads(DebuggerUpdate):
             print('    {}: {}'.format(i_thread, thread), file=out)
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 
 class ThreadInfo(object):
+    __slots__ = ('is_primary', 'stop_reason', 'stop_reason_detail',
+                 'line_num', 'func_name', 'file_name', 'code_snippet')
+
     def __init__(self, debugger_client, io_counter):
         d = debugger_client
         flags = d.recv_uint8(io_counter)
         self.is_primary = False
-        if flags & _ThreadInfoFlags.IS_PRIMARY:
+        if flags & _THREAD_INFO_IS_PRIMARY:
             self.is_primary = True
         try:
             stop_int = d.recv_uint32(io_counter)
-            self.stop_reason = ThreadStopReason(stop_int)
-        except ValueError:
+            self.stop_reason = _THREAD_STOP_REASONS[stop_int]
+        except KeyError:
             do_exit(1, 'Bad thread stop reason from target: {}'.format(
                 stop_int))
 
@@ -998,6 +1012,15 @@ class _VarInfoFlag(enum.IntEnum):
     def __str__(self):
         return repr(self)
 
+# Plain int masks, for testing the flags of every variable received
+_VAR_INFO_IS_CHILD_KEY = int(_VarInfoFlag.IS_CHILD_KEY)
+_VAR_INFO_IS_CONST = int(_VarInfoFlag.IS_CONST)
+_VAR_INFO_IS_CONTAINER = int(_VarInfoFlag.IS_CONTAINER)
+_VAR_INFO_IS_NAME_HERE = int(_VarInfoFlag.IS_NAME_HERE)
+_VAR_INFO_IS_REF_COUNTED = int(_VarInfoFlag.IS_REF_COUNTED)
+_VAR_INFO_IS_VALUE_HERE = int(_VarInfoFlag.IS_VALUE_HERE)
+_VAR_INFO_IS_KEYS_CASE_SENSITIVE = int(_VarInfoFlag.IS_KEYS_CASE_SENSITIVE)
+
 
 # Response to 'variables' command
 class DebuggerResponse_Variables(DebuggerUpdate):
@@ -1018,18 +1041,19 @@ class DebuggerResponse_Variables(DebuggerUpdate):
         #   void*  value;           // present iff VARINFO_IS_VALUE_HERE in flags
         #                           // value data is dependent upon var_type
         # [ variable info repeated num_variables times ]
-        super(DebuggerResponse_Variables, self).__init__()
+        super(DebuggerResponse_Variables, self).__init__(base_response)
         self._debug_level = 0
+        self._resolve_debug_level()
         d = debugger_client
-        self._copy_from(base_response)
         num_vars = d.recv_uint32(self)
         if self.__check_debug(5):
             print('debug: dresp: reading {} vars'.format(num_vars))
-        self.variables = []
-        for _ in range(num_vars):
+        trace_each = self.__check_debug(3)
+        self.variables = [None] * num_vars
+        for i_var in range(num_vars):
             var = DebuggerVariable(d, self)
-            self.variables.append(var)
-            if self.__check_debug(3):
+            self.variables[i_var] = var
+            if trace_each:
                 print('debug: dresp: read var: {}'.format(var))
 
     # parameters inside the response to __str__()
@@ -1040,12 +1064,8 @@ class DebuggerResponse_Variables(DebuggerUpdate):
         return s
 
     def get_parent_var(self):
-        parent_var = None
-        for var in self.variables:
-            if not var.is_child_key:
-                parent_var = var
-                break
-        return parent_var
+        return next((var for var in self.variables if not var.is_child_key),
+                    None)
 
     # Get a description of the parent variable, and optionally all
     # child variables.
@@ -1072,26 +1092,16 @@ class DebuggerResponse_Variables(DebuggerUpdate):
 
     # @return array of strings, may be empty or None
     def get_child_keys_as_strs_sorted(self):
-        keys = None
-
         # If no parent_var is found, then this should be a list of all
         # variables in a local scope
         parent_var = self.get_parent_var()
         keys_are_strings = (parent_var == None) or \
                             (parent_var.key_type == VariableType.STRING)
-        keys = list()
-        if self.variables:
-            child_index = -1
-            for var in self.variables:
-                if var.is_child_key:
-                    child_index += 1
-                    if keys_are_strings:
-                        keys.append(var.name)
-                    else:
-                        keys.append(str(child_index))
         if keys_are_strings:
-            keys.sort()
-        return keys
+            return sorted(var.name for var in self.variables if var.is_child_key)
+        # Indexed container: the keys are the child indexes, in order
+        child_count = sum(1 for var in self.variables if var.is_child_key)
+        return [str(i) for i in range(child_count)]
 
     def dump(self, fout, line_prefix=None):
         if not line_prefix:
@@ -1120,16 +1130,29 @@ class DebuggerResponse_Variables(DebuggerUpdate):
                 var._validate()
 
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 
 class DebuggerVariable(object):
+    # One of these is built per variable received, so no per-instance dict,
+    # and only what is used after __init__() returns is kept in a slot
+    __slots__ = ('_effective_debug_level', '__variable_type',
+                 '__subtype', '__subsubtype', 'name',
+                 'ref_count', 'key_type', 'element_count', 'value',
+                 'is_child_key', 'is_container_type',
+                 'is_keys_case_sensitive', 'is_const', 'is_ref_counted',
+                 '__trace_reads')
+
+    _debug_level = 0    # debug level for all DebuggerVariables
+
     def __init__(self, debugger_client, io_counter):
         # See DebuggerResponse_Variables.__init__() for details on the
         # data received ( ^ it's immediately above ^ )
-        self._debug_level = 0
+        # One of these is built per variable, resolve the level once
+        self._effective_debug_level = max(global_config.debug_level,
+                                          self._debug_level)
+        self.__trace_reads = self.__check_debug(5)
+        trace_fields = self.__check_debug(8)
         d = debugger_client
 
         # Set default values
@@ -1140,7 +1163,6 @@ class DebuggerVariable(object):
         #           SUBTYPED_OBJECT: roSGNode:Node
         self.__subtype = None  # types: OBJECT, INTERFACE, SUBTYPED_OBJECT
         self.__subsubtype = None # types: SUBTYPED_OBJECT
-        self.__io_counter = io_counter
         self.ref_count = None
         self.key_type = None
         self.element_count = None
@@ -1154,7 +1176,7 @@ class DebuggerVariable(object):
 
         # Start reading
         flags = d.recv_uint8(io_counter)
-        self.__variable_type = self.__read_value_type(d)
+        self.__variable_type = self.__read_value_type(d, io_counter)
 
         # NOTE: It would be a good idea to add a flag IS_INDEXED_VALUE
         # to the BrightScript debugging protocol, to better support arrays.
@@ -1162,42 +1184,41 @@ class DebuggerVariable(object):
         # place of the name. That would also support paging of array
         # contents, should that be desirable.
 
-        if flags & _VarInfoFlag.IS_NAME_HERE:
+        if flags & _VAR_INFO_IS_NAME_HERE:
             self.name = d.recv_str(io_counter)
-        if self.__check_debug(5):
+        if self.__trace_reads:
             print('debug: dresp: reading var: flags={},name={},type={}'.format(
                 _format_var_info_flags(flags), self.name, self.__variable_type))
 
-        if flags & _VarInfoFlag.IS_CHILD_KEY:
-            self.is_child_key = True
-        if flags & _VarInfoFlag.IS_CONST:
-            self.is_const = True
-        if flags & _VarInfoFlag.IS_REF_COUNTED:
+        self.is_child_key = bool(flags & _VAR_INFO_IS_CHILD_KEY)
+        self.is_const = bool(flags & _VAR_INFO_IS_CONST)
+        if flags & _VAR_INFO_IS_REF_COUNTED:
             self.is_ref_counted = True
             self.ref_count = d.recv_uint32(io_counter)
-            if self.__check_debug(8):
+            if trace_fields:
                 print('debug: dresp: read ref_count={}'.format(self.ref_count))
 
         # Container metadata
-        if flags & _VarInfoFlag.IS_CONTAINER:
+        if flags & _VAR_INFO_IS_CONTAINER:
             self.is_container_type = True
             self.is_keys_case_sensitive = \
-                 True if flags & _VarInfoFlag.IS_KEYS_CASE_SENSITIVE else False
-            self.key_type = self.__read_value_type(d)
-            if self.__check_debug(8):
+                 bool(flags & _VAR_INFO_IS_KEYS_CASE_SENSITIVE)
+            self.key_type = self.__read_value_type(d, io_counter)
+            if trace_fields:
                 print('debug: dresp: read key_type={}'.format(str(self.key_type)))
             self.element_count = d.recv_uint32(io_counter)
-            if self.__check_debug(8):
+            if trace_fields:
                 print('debug: dresp: read element_count={}'.format(self.element_count))
         else:
             self.is_keys_case_sensitive = False
-            if flags & _VarInfoFlag.IS_KEYS_CASE_SENSITIVE:
+            if flags & _VAR_INFO_IS_KEYS_CASE_SENSITIVE:
                 do_exit(1, "Bad data from target: case-sensitive for non-container") 
 
-        if flags & _VarInfoFlag.IS_VALUE_HERE:
-            self.__read_value(d)
+        if flags & _VAR_INFO_IS_VALUE_HERE:
+            self.__read_value(d, io_counter)
 
-        self._validate()
+        if self.__check_debug(1): # 1 = validate
+            self._validate()
 
     def get_value_str_for_user(self, use_type_if_no_value=True):
         VT = VariableType
@@ -1245,44 +1266,21 @@ class DebuggerVariable(object):
 
     def get_type_name_for_user(self):
         tcode = self.__variable_type
+        name = _TYPE_NAMES_FOR_USER.get(tcode)
+        if name is not None:
+            return name
         VT = VariableType
-        if tcode == VT.AA:
-            return "roAssociativeArray"
-        elif tcode == VT.ARRAY:
-            return 'roArray'
-        elif tcode == VT.BOOLEAN:
-            return 'Boolean'
-        elif tcode == VT.DOUBLE:
-            return 'Double'
-        elif tcode == VT.FLOAT:
-            return 'Float'
-        elif tcode == VT.FUNCTION:
-            return 'Function'
-        elif tcode == VT.INTEGER:
-            return 'Integer'
-        elif tcode == VT.INTERFACE:
-            return 'Interface:{}'.format(self.__subtype)
-        elif tcode == VT.INVALID:
-            return 'Invalid'
-        elif tcode == VT.LIST:
-            return 'roList'
-        elif tcode == VT.LONG_INTEGER:
-            return 'LongInteger'
-        elif tcode == VT.OBJECT:
-            return self.__subtype
-        elif tcode == VT.STRING:
+        if tcode == VT.STRING:
             if self.is_const:
                 return 'String (VT_STR_CONST)'
             else:
                 return 'roString'
-        elif tcode == VT.SUBROUTINE:
-            return 'Subroutine'
+        elif tcode == VT.OBJECT:
+            return self.__subtype
         elif tcode == VT.SUBTYPED_OBJECT:
             return '{}:{}'.format(self.__subtype, self.__subsubtype)
-        elif tcode == VT.UNINITIALIZED:
-            return '<uninitialized>'
-        elif tcode == VT.UNKNOWN:
-            return '<UNKNOWN>'
+        elif tcode == VT.INTERFACE:
+            return 'Interface:{}'.format(self.__subtype)
         else:
             raise AssertionError('Bad value for type: {}'.format(tcode))
 
@@ -1303,21 +1301,21 @@ class DebuggerVariable(object):
         var_type_name = None
         if self.__variable_type:
             var_type_name = self.__variable_type.name
-        key_type_name = None
-        if self.key_type:
-            key_type_name = self.key_type.name
-        s = 'name={},type={}'.format(self.name, var_type_name)
+        parts = ['name={},type={}'.format(self.name, var_type_name)]
         if self.ref_count:
-            s += ',ref_count={}'.format(self.ref_count)
+            parts.append(',ref_count={}'.format(self.ref_count))
         if self.is_container_type:
-            s += ',iscontainer'
+            parts.append(',iscontainer')
             if self.is_keys_case_sensitive:
-                s += ',casesensitive'
-            s += ',key_type={}'.format(key_type_name)
-            s += ',el_count={}'.format(self.element_count)
+                parts.append(',casesensitive')
+            key_type_name = None
+            if self.key_type:
+                key_type_name = self.key_type.name
+            parts.append(',key_type={},el_count={}'.format(
+                key_type_name, self.element_count))
         if self.is_child_key:
-            s += ',ischildkey'
-        return s
+            parts.append(',ischildkey')
+        return ''.join(parts)
 
     # raises an AssertError if this variable not internally consistent
     def _validate(self): # class DebuggerVariable
@@ -1368,11 +1366,11 @@ class DebuggerVariable(object):
             else:
                 assert self.__variable_type not in _g_container_types
 
-    def __read_value_type(self, debugger_client):
-        raw_var_type = debugger_client.recv_uint8(self.__io_counter)
+    def __read_value_type(self, debugger_client, io_counter):
+        raw_var_type = debugger_client.recv_uint8(io_counter)
         try:
-            var_type = VariableType(raw_var_type)
-        except ValueError:
+            var_type = _VARIABLE_TYPES[raw_var_type]
+        except KeyError:
             if self.__check_debug(2):
                 print('debug: exception:')
                 traceback.print_exc(file=sys.stdout)
@@ -1381,116 +1379,31 @@ class DebuggerVariable(object):
                             raw_var_type))
         return var_type
 
-    def __read_value(self, debugger_client):
+    def __read_value(self, debugger_client, io_counter):
         d = debugger_client
         tcode = self.__variable_type
-        VT = VariableType
-        if self.__check_debug(5):
+        if self.__trace_reads:
             print('debug: dresp: reading var value, type={}'.format(str(tcode)))
-        if tcode == VT.AA:
-            raise AssertionError('AA should not have a value')
-        elif tcode == VT.ARRAY:
-            raise AssertionError('Array should not have a value')
-        elif tcode == VT.BOOLEAN:
-            self.__read_value_boolean(d)
-        elif tcode == VT.DOUBLE:
-            self.__read_value_double(d)
-        elif tcode == VT.FLOAT:
-            self.__read_value_float(d)
-        elif tcode == VT.FUNCTION:
-            self.__read_value_function(d)
-        elif tcode == VT.INTEGER:
-            self.__read_value_integer(d)
-        elif tcode == VT.INTERFACE:
-            self.__read_value_interface(d)
-        elif tcode == VT.INVALID:
-            self.__read_value_invalid(d)
-        elif tcode == VT.LIST:
-            raise AssertionError('list should not have a value')
-        elif tcode == VT.LONG_INTEGER:
-            self.__read_value_long_integer(d)
-        elif tcode == VT.OBJECT:
-            self.__read_value_object(d)
-        elif tcode == VT.STRING:
-            self.__read_value_string(d)
-        elif tcode == VT.SUBROUTINE:
-            self.__read_value_subroutine(d)
-        elif tcode == VT.SUBTYPED_OBJECT:
-            self.__read_value_subtyped_object(d)
+        receive = _VALUE_RECEIVERS.get(tcode)
+        if receive:
+            self.value = receive(d, io_counter)
+        # Subtypes are drawn from a small set of names (e.g., roSGNode),
+        # that are repeated across many variables
+        elif tcode == VariableType.OBJECT or tcode == VariableType.INTERFACE:
+            self.__subtype = sys.intern(d.recv_str(io_counter))
+        elif tcode == VariableType.SUBTYPED_OBJECT:
+            self.__subtype = sys.intern(d.recv_str(io_counter))
+            self.__subsubtype = sys.intern(d.recv_str(io_counter))
+        elif tcode in _g_container_types:
+            raise AssertionError('{} should not have a value'.format(
+                tcode.name))
         else:
             do_exit(1,
                 'INTERNAL ERROR: Variable type has a value but shoud not: {}'.\
                     format(repr(tcode)))
 
-    def __read_value_boolean(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Boolean')
-        int_val = debugger_client.recv_uint8(self.__io_counter)
-        if int_val:
-            self.value = True
-        else:
-            self.value = False
-
-    def __read_value_double(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Double')
-        self.value = debugger_client.recv_double(self.__io_counter)
-
-    def __read_value_float(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Float')
-        self.value = debugger_client.recv_float(self.__io_counter)
-
-    def __read_value_function(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Function')
-        self.value = debugger_client.recv_str(self.__io_counter)
-
-    def __read_value_integer(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Integer')
-        self.value = debugger_client.recv_int32(self.__io_counter)
-
-    def __read_value_interface(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Interface')
-        self.__subtype = debugger_client.recv_str(self.__io_counter)
-
-    def __read_value_invalid(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Invalid')
-        self.value = None
-
-    def __read_value_long_integer(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=LongInteger')
-        self.value = debugger_client.recv_long(self.__io_counter)
-
-    def __read_value_object(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Object')
-        self.__subtype = debugger_client.recv_str(self.__io_counter)
-
-    def __read_value_string(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=String')
-        self.value = debugger_client.recv_str(self.__io_counter)
-
-    def __read_value_subroutine(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=Subroutine')
-        self.value = debugger_client.recv_str(self.__io_counter)
-
-    def __read_value_subtyped_object(self, debugger_client):
-        if self.__check_debug(5):
-            print('debug: dresp: reading var type=SubtypedObject')
-        self.__subtype = debugger_client.recv_str(self.__io_counter)
-        self.__subsubtype = debugger_client.recv_str(self.__io_counter)
-
     def __check_debug(self, min_level):
-        lvl = max(global_config.debug_level, self._debug_level)
-        if lvl: assert global_config.debug_level >= 0 and self._debug_level >= 0 and min_level >= 1
-        return lvl >= min_level
+        return self._effective_debug_level >= min_level
 
 #END class DebuggerVariable
 
@@ -1511,17 +1424,13 @@ class DebuggerUpdate_ConnectIoPort(DebuggerUpdate):
     # The returned response is a new object that has a copy of all
     # relevent information from baseResponse
     def __init__(self, debugger_client, baseResponse):
-        super(DebuggerUpdate_ConnectIoPort, self).__init__()
+        super(DebuggerUpdate_ConnectIoPort, self).__init__(baseResponse)
         d = debugger_client
-        self._copy_from(baseResponse)
         self.io_port = d.recv_uint32(self)
 
     # parameters inside the response to __str__()
     def str_params(self):
-        s = '{},port={}'.format(
-            super(DebuggerUpdate_ConnectIoPort, self).str_params(),
-            self.io_port)
-        return s
+        return f'{super().str_params()},port={self.io_port}'
 
 
 class DebuggerUpdate_AllThreadsStopped(DebuggerUpdate):
@@ -1529,16 +1438,14 @@ class DebuggerUpdate_AllThreadsStopped(DebuggerUpdate):
     # The returned response is a new object that has a copy of all
     # relevent information from baseResponse
     def __init__(self, debugger_client, baseResponse):
-        super(DebuggerUpdate_AllThreadsStopped, self).__init__()
+        super(DebuggerUpdate_AllThreadsStopped, self).__init__(baseResponse)
         dc = debugger_client
-        self._copy_from(baseResponse)
-        self.primary_thread_index = dc.recv_int32(self)
-        stop_int = dc.recv_uint8(self)
+        self.primary_thread_index, stop_int = dc.recv_int32_uint8(self)
         try:
-            self.stop_reason = ThreadStopReason(stop_int)
-        except ValueError:
+            self.stop_reason = _THREAD_STOP_REASONS[stop_int]
+        except KeyError:
             do_exit(1, 'Bad value for stop_reason from target: {}'.format(stop_int))
-        self.stop_reason_detail = dc.recv_str(self)
+        self.stop_reason_detail = sys.intern(dc.recv_str(self))
 
     # raises AssertionError if things are not right
     def _validate(self):    # class DebuggerUpdate_AllThreadsstopped
@@ -1546,12 +1453,10 @@ class DebuggerUpdate_AllThreadsStopped(DebuggerUpdate):
         assert self.stop_reason_detail
 
     def str_params(self):
-        s = '{},primarythridx={},stopreason={},stopdetail="{}"'.format(
-            super(DebuggerUpdate_AllThreadsStopped, self).str_params(),
-            self.primary_thread_index,
-            self.stop_reason,
-            self.stop_reason_detail)
-        return s
+        return (f'{super().str_params()},'
+                f'primarythridx={self.primary_thread_index},'
+                f'stopreason={self.stop_reason},'
+                f'stopdetail="{self.stop_reason_detail}"')
 
 
 class DebuggerUpdate_BreakpointError(DebuggerUpdate):
@@ -1559,9 +1464,8 @@ class DebuggerUpdate_BreakpointError(DebuggerUpdate):
     # The returned response is a new object that has a copy of all
     # relevent information from baseResponse
     def __init__(self, debugger_client, baseResponse):
-        super(DebuggerUpdate_BreakpointError, self).__init__()
+        super(DebuggerUpdate_BreakpointError, self).__init__(baseResponse)
         dc = debugger_client
-        self._copy_from(baseResponse)
         self.flags = dc.recv_uint32(self)
         self.breakpoint_id = dc.recv_uint32(self)
 
@@ -1607,9 +1511,8 @@ class DebuggerUpdate_CompileError(DebuggerUpdate):
     # The returned response is a new object that has a copy of all
     # relevent information from baseResponse
     def __init__(self, debugger_client, baseResponse):
-        super(DebuggerUpdate_CompileError, self).__init__()
+        super(DebuggerUpdate_CompileError, self).__init__(baseResponse)
         dc = debugger_client
-        self._copy_from(baseResponse)
         self.flags = dc.recv_uint32(self)
         self.err_str = dc.recv_str(self)
         self.file_spec = dc.recv_str(self)
@@ -1658,17 +1561,15 @@ class DebuggerUpdate_ThreadAttached(DebuggerUpdate):
     # The returned response is a new object that has a copy of all
     # relevent information from base_response
     def __init__(self, debugger_client, base_response):
-        super(DebuggerUpdate_ThreadAttached, self).__init__()
+        super(DebuggerUpdate_ThreadAttached, self).__init__(base_response)
         dc = debugger_client
-        self._copy_from(base_response)
-        self.thread_index = dc.recv_int32(self)
-        stop_int = dc.recv_uint8(self)
+        self.thread_index, stop_int = dc.recv_int32_uint8(self)
         try:
-            self.stop_reason = ThreadStopReason(stop_int)
-        except ValueError:
+            self.stop_reason = _THREAD_STOP_REASONS[stop_int]
+        except KeyError:
             do_exit(1, 'Bad value for stop_reason from target: {}'.format(
                 stop_int))
-        self.stop_reason_detail = dc.recv_str(self)
+        self.stop_reason_detail = sys.intern(dc.recv_str(self))
 
     # raises AssertionError if things are not right
     def _validate(self):    # class DebuggerUpdate_ThreadAttached
@@ -1677,21 +1578,19 @@ class DebuggerUpdate_ThreadAttached(DebuggerUpdate):
         assert self.stop_reason_detail
 
     def str_params(self):
-        s = '{},thridx={},stopreason={},stopdetail={}'.format(
-            super(DebuggerUpdate_ThreadAttached, self).str_params(),
-            self.thread_index,
-            str(self.stop_reason),  # str.format() does not call str() for enum
-            self.stop_reason_detail)
-        return s
+        # !s because f-strings, like str.format(), do not call str() for enum
+        return (f'{super().str_params()},'
+                f'thridx={self.thread_index},'
+                f'stopreason={self.stop_reason!s},'
+                f'stopdetail={self.stop_reason_detail}')
 
 class DebuggerUpdate_ProtocolError(DebuggerUpdate):
     # Finish reading the response that was started in baseResponse
     # The returned response is a new object that has a copy of all
     # relevent information from base_response
     def __init__(self, debugger_client, base_response):
-        super(DebuggerUpdate_ProtocolError, self).__init__()
+        super(DebuggerUpdate_ProtocolError, self).__init__(base_response)
         dc = debugger_client
-        self._copy_from(base_response)
         self.flags = dc.recv_int32(self)
         error_int = dc.recv_int32(self)
         try:
@@ -1713,20 +1612,18 @@ class DebuggerUpdate_ProtocolError(DebuggerUpdate):
 
 def _format_var_info_flags(info_flags):
     assert (info_flags == None) or isinstance(info_flags, int)
-    if not info_flags:
-        info_flags = 0
-    s = 'VarInfoFlags[0x{:02x}'.format(info_flags)
-    first_flag = True
-    for one_flag in _VarInfoFlag:
-        if info_flags & one_flag.value:
-            if first_flag:
-                s += '='
-                first_flag = False
-            else:
-                s += ','
-            s += one_flag.name
-    s += ']'
-    return s
+    return _VAR_INFO_FLAGS_STRS[info_flags or 0]
+
+def _build_var_info_flags_str(info_flags):
+    names = [one_flag.name for one_flag in _VarInfoFlag
+                if info_flags & one_flag.value]
+    if not names:
+        return 'VarInfoFlags[0x{:02x}]'.format(info_flags)
+    return 'VarInfoFlags[0x{:02x}={}]'.format(info_flags, ','.join(names))
+
+# The flags are received as one byte, so every possible value is
+# formatted once, here
+_VAR_INFO_FLAGS_STRS = tuple(_build_var_info_flags_str(i) for i in range(256))
 
 def get_stop_reason_str_for_user(stop_reason, stop_reason_detail):
     s = stop_reason.to_str_for_user()
@@ -1740,9 +1637,8 @@ class DebuggerUpdate_BreakpointVerified(DebuggerUpdate):
     # The returned response is a new object that has a copy of all
     # relevent information from baseResponse
     def __init__(self, debugger_client, baseResponse):
-        super(DebuggerUpdate_BreakpointVerified, self).__init__()
+        super(DebuggerUpdate_BreakpointVerified, self).__init__(baseResponse)
         dc = debugger_client
-        self._copy_from(baseResponse)
         self.flags = dc.recv_uint32(self)
         self.breakpoint_num = dc.recv_uint32(self)
 
@@ -1766,3 +1662,37 @@ class DebuggerUpdate_BreakpointVerified(DebuggerUpdate):
 
     def __check_debug(self, min_level):
         return global_config.debug_level >= min_level
+
+
+# read_update() dispatch tables, used instead of if/elif chains because
+# one of these lookups is done for every message received.
+
+# The class that reads the remainder of a successful response to a
+# request, by CmdCode. None if the response has no additional data.
+_RESPONSE_CLASSES = {
+    CmdCode.ADD_BREAKPOINTS: DebuggerResponse_AddBreakpoints,
+    CmdCode.ADD_CONDITIONAL_BREAKPOINTS: DebuggerResponse_AddConditionalBreakpoints,
+    CmdCode.CONTINUE: None,
+    CmdCode.EXECUTE: DebuggerResponse_Execute,
+    CmdCode.EXIT_CHANNEL: None,
+    CmdCode.LIST_BREAKPOINTS: DebuggerResponse_ListBreakpoints,
+    CmdCode.REMOVE_BREAKPOINTS: DebuggerResponse_RemoveBreakpoints,
+    CmdCode.STACKTRACE: DebuggerResponse_Stacktrace,
+    CmdCode.STEP: None,
+    CmdCode.STOP: None,
+    CmdCode.THREADS: DebuggerResponse_Threads,
+    CmdCode.VARIABLES: DebuggerResponse_Variables,
+}
+
+# The class that reads the remainder of an update that is not a
+# response to a request, by UpdateType. IntEnum keys hash like their
+# int values, so these can be looked up with the raw value received.
+_UPDATE_CLASSES = {
+    UpdateType.ALL_THREADS_STOPPED: DebuggerUpdate_AllThreadsStopped,
+    UpdateType.BREAKPOINT_ERROR: DebuggerUpdate_BreakpointError,
+    UpdateType.BREAKPOINT_VERIFIED: DebuggerUpdate_BreakpointVerified,
+    UpdateType.COMPILE_ERROR: DebuggerUpdate_CompileError,
+    UpdateType.CONNECT_IO_PORT: DebuggerUpdate_ConnectIoPort,
+    UpdateType.THREAD_ATTACHED: DebuggerUpdate_ThreadAttached,
+    UpdateType.PROTOCOL_ERROR: DebuggerUpdate_ProtocolError,
+}
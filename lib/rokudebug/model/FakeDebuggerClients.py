@@ -110,6 +110,9 @@ class FakeDebuggerClient(AbstractDebuggerClient):
         with self.__pending_lock:
             return len(self.__pending_requests)
 
+    def get_listener_error(self):
+        return None
+
     def shutdown(self) -> None:
         pass
 
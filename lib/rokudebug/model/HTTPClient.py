@@ -81,15 +81,20 @@
 # it difficult (but not impossible) for other classes to access
 # those identifiers.
 
-from .DebugUtils import dump_bytes
+from .DebugUtils import do_exit, dump_bytes
 
 CRLF = '\r\n'
 HDR_ENC = 'iso-8859-1'    # Encoding used for headers, responses
+_CRLF_BYTES = CRLF.encode(HDR_ENC)
 HTTP_VERSION_STR = 'HTTP/1.1'
 DEFAULT_PORT = 80
 
-# Specification of a form field, passed to buildMultipartFormData()
+# Specification of a form field, passed to computeMultipartLength() and
+# sendMultipartFields()
 class HTTPFormFieldSpec(object):
+    # fieldValue may be a str, a bytes-like object (bytes, bytearray,
+    # memoryview), or a binary file object opened for reading. bytes-like
+    # and file values are not copied when the body is sent.
     def __init__(self,
                  fieldName, fieldValue, attributes=None, contentType=None):
         self.mName = fieldName
@@ -108,6 +113,8 @@ class HTTPResponse(object):
     def _readResponse(self):
         self.mHeaders = {}
         line = self._readLine()
+        if not len(line):
+            raise ConnectionError('Connection closed by server')
         parts = line.split(' ', maxsplit=2)
         self.mHTTPVersion = parts[0]
         self.mStatus = int(parts[1])
@@ -126,6 +133,29 @@ class HTTPResponse(object):
     def getHeader(self, name):
         return self.mHeaders[name]
 
+    # @return True if the server has indicated that it will close the
+    # connection after this response (i.e., "Connection: close")
+    def isConnectionClose(self):
+        for (name, value) in self.mHeaders.items():
+            if name.lower() == 'connection':
+                return value.strip().lower() == 'close'
+        return False
+
+    # Reads and discards the body of this response, if it has one.
+    # The body length is taken from the Content-Length header; responses
+    # without that header are assumed to have no body.
+    def discardBody(self):
+        remaining = 0
+        for (name, value) in self.mHeaders.items():
+            if name.lower() == 'content-length':
+                remaining = int(value)
+                break
+        while remaining > 0:
+            r = self.mSocket.recv(min(remaining, 4096))
+            if not len(r): # EOF
+                break
+            remaining -= len(r)
+
     # return a list of (name,value) tuples
     def getHeaders(self):
         headers = []
@@ -165,6 +195,8 @@ class HTTPConnection(object):
         else:
             self.mPort = DEFAULT_PORT
         self.mSocket = None
+        self.__last_response = None
+        self.__header_buf = None    # bytearray, set by putRequest()
 
     def set_debug_level(self, debug_level):
         self.__debug_level = debug_level
@@ -174,47 +206,134 @@ class HTTPConnection(object):
         self.mSocket = socket.create_connection((self.mHost, self.mPort))
 
     def close(self):
+        self.__last_response = None
         if self.mSocket:
             self.mSocket.close()
             self.mSocket = None
 
-    def send(self, data):
-        if self.__debug_level >= 5:
-            maxLen = 500
-            if self.__debug_level >= 10:
-                maxLen = None
-            print('debug: http send: ', end='')
-            dump_bytes(data, forceEol=True, maxLen=maxLen)
-        count = self.mSocket.send(data)
-        if count != len(data):
-            raise ConnectionError('Failed sending data to server')
-        return count
+    # Prepare this connection to send another request, after a response
+    # has been received. The body of the previous response is drained,
+    # so that the socket can be re-used (keep-alive). If the server
+    # indicated that it would close the connection, a new connection
+    # is made.
+    def reset_request_state(self):
+        response = self.__last_response
+        self.__last_response = None
+        if response and response.isConnectionClose():
+            if self.__debug_level >= 2:
+                print('debug: http: server closed connection, reconnecting')
+            self.close()
+            self.connect()
+        elif response:
+            response.discardBody()
 
+    # The request line and headers are accumulated in a buffer, and
+    # sent with a single sendall() by endHeaders(), so that they do not
+    # go out as many tiny TCP segments.
     def putRequest(self, method, path):
-        self.send('{} {} {}{}'.format(
+        self.__header_buf = bytearray('{} {} {}{}'.format(
             method, path, HTTP_VERSION_STR, CRLF).encode(HDR_ENC))
 
     # headers must be a list of (name,value) tuples
+    # A value may be pre-encoded bytes, which are sent as-is
     def putHeaders(self, headers):
+        buf = self.__header_buf
         for (name,value) in headers:
-            self.send('{}: {}{}'.format(name, value, CRLF)
-                .encode(HDR_ENC))
+            buf += name.encode(HDR_ENC)
+            buf += b': '
+            if isinstance(value, bytes):
+                buf += value
+            else:
+                buf += str(value).encode(HDR_ENC)
+            buf += _CRLF_BYTES
 
     def endHeaders(self):
-        self.send(CRLF.encode(HDR_ENC))
+        buf = self.__header_buf
+        self.__header_buf = None
+        buf += _CRLF_BYTES
+        self.__send_part(buf)
 
     # @return HTTPResponse object
     def getResponse(self):
-        return HTTPResponse(self.mSocket, self.__debug_level)
+        self.__last_response = HTTPResponse(self.mSocket, self.__debug_level)
+        return self.__last_response
+
+    # Sends a multipart/form-data body, one part at a time, directly to
+    # the socket. boundary must be the one returned from
+    # computeMultipartLength() for the same fieldSpecs. Field values
+    # are not copied: bytes-like values are handed to the socket as-is
+    # and file objects are sent with socket.sendfile(), which uses the
+    # sendfile(2) syscall where available.
+    # @return total number of bytes sent
+    def sendMultipartFields(self, boundary, fieldSpecs):
+        count = 0
+        is_corked = self.__set_tcp_cork(True)
+        try:
+            for part in HTTPConnection.__getMultipartParts(boundary, fieldSpecs):
+                if hasattr(part, 'fileno'):
+                    if self.__debug_level >= 5:
+                        print('debug: http send: <file: {}>'.format(
+                            getattr(part, 'name', '?')))
+                    count += self.mSocket.sendfile(part, 0)
+                else:
+                    self.__send_part(part)
+                    count += len(part)
+        finally:
+            if is_corked:
+                self.__set_tcp_cork(False)
+        return count
 
-    # Get the data and a boundary token. The boundary separates
-    # form fields in the body, and must be included in the
-    # Content-Type header.
-    # @return (str boundary, byte[] data)
+    # On linux, TCP_CORK makes the kernel hold partial segments until
+    # the cork is removed, so that small headers sent before and after
+    # a file go out in full TCP segments along with the file's data.
+    # @return True if the option was set, False if not supported
+    def __set_tcp_cork(self, enable):
+        import socket
+        tcp_cork = getattr(socket, 'TCP_CORK', None)
+        if tcp_cork is None:
+            return False
+        try:
+            self.mSocket.setsockopt(socket.IPPROTO_TCP, tcp_cork,
+                1 if enable else 0)
+        except OSError:
+            return False
+        return True
+
+    def __send_part(self, part):
+        if self.__debug_level >= 5:
+            maxLen = 500
+            if self.__debug_level >= 10:
+                maxLen = None
+            print('debug: http send: ', end='')
+            dump_bytes(part, forceEol=True, maxLen=maxLen)
+        self.mSocket.sendall(part)
+
+    # Compute the length of a multipart/form-data body, without building
+    # the body. The boundary separates form fields in the body, and must
+    # be included in the Content-Type header and passed to
+    # sendMultipartFields().
+    # @return (str boundary, int total_len)
     @staticmethod
-    def buildMultipartFormData(fieldSpecs):
+    def computeMultipartLength(fieldSpecs):
         import uuid
         boundary = '{}'.format(uuid.uuid4())  # random
+        total_len = 0
+        for part in HTTPConnection.__getMultipartParts(boundary, fieldSpecs):
+            if hasattr(part, 'fileno'):
+                import os
+                total_len += os.fstat(part.fileno()).st_size
+            else:
+                total_len += len(part)
+        return (boundary, total_len)
+
+    # Split a multipart/form-data body into an ordered list of parts.
+    # Each field's headers are encoded into a small buffer, and each
+    # field's value is included in the list without being copied, if
+    # it is bytes-like or a file object.
+    # @return list of bytes-like and/or file objects
+    @staticmethod
+    def __getMultipartParts(boundary, fieldSpecs):
+        parts = []
         body = bytearray()
         crlfBytes = '\r\n'.encode(HDR_ENC)
         for field in fieldSpecs:
@@ -233,16 +352,18 @@ class HTTPConnection(object):
                 body.extend('Content-Type:{}\r\n'.format(
                     field.mContentType).encode(HDR_ENC))
             body.extend(crlfBytes)
-            if isinstance(field.mValue, bytes) or \
-                    isinstance(field.mValue, bytearray):
-                body.extend(field.mValue)
+            if isinstance(field.mValue, (bytes, bytearray, memoryview)) or \
+                    hasattr(field.mValue, 'fileno'):
+                parts.append(body)
+                parts.append(field.mValue)
+                body = bytearray()
             else:
                 body.extend('{}'.format(field.mValue).encode(HDR_ENC))
             body.extend(crlfBytes)
 
         body.extend('--{}\r\n'.format(boundary).encode(HDR_ENC))
-
-        return (boundary, body)
+        parts.append(body)
+        return parts
 
     def debugDumpRequest(self, headers, bodyData):
         print('\n\nvvvvvvvvvv debug:REQUEST vvvvvvvvvv')
@@ -252,7 +373,3 @@ class HTTPConnection(object):
             print('{}:{}'.format(name, value))
         dump_bytes(bodyData, label='BODY', forceEol=True)
         print('^^^^^^^^^^ debug:REQUEST ^^^^^^^^^^')
-
-import sys
-def do_exit(errCode, msg=None):
-    sys.modules['__main__'].do_exit(errCode, msg)
@@ -246,12 +246,8 @@ def get_supported_protocol_major_versions():
     return _SUPPORTED_PROTOCOL_MAJOR_VERSIONS
 
 def get_supported_protocols_str():
-    supported_str = ''
-    for one_ver in sorted(_SUPPORTED_PROTOCOL_MAJOR_VERSIONS):
-        if len(supported_str):
-            supported_str += ','
-        supported_str += '{}.x'.format(one_ver)
-    return supported_str
+    return ','.join('{}.x'.format(one_ver)
+        for one_ver in sorted(_SUPPORTED_PROTOCOL_MAJOR_VERSIONS))
 
 # Exits this script if this client's protocol version is not
 # compatible with any of this debugger's supported_versions.
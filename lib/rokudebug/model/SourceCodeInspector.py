@@ -28,8 +28,9 @@
 # it difficult (but not impossible) for other classes to access
 # those identifiers.
 
-import os, re, sys, traceback, zipfile
+import linecache, os, re, sys, traceback, zipfile
 
+from .DebugUtils import do_exit
 from .Verbosity import Verbosity
 
 global_config = getattr(sys.modules['__main__'], 'global_config', None)
@@ -81,35 +82,23 @@ class _LibrarySource(object):
         self.spec = lib_src_spec
 
     # Read [first_line_number, last_line_number] inclusive, 1-based
+    # File contents are cached by linecache, so that repeated reads
+    # of the same file do not go to the filesystem.
     def read_lines(self, file_path, first_line_number, last_line_number):
         if self.__check_debug(3):
             print('debug: libsrc: read_lines() {},{},{},{})'.format(
                 self.spec, file_path, first_line_number, last_line_number))
         while len(file_path) and file_path[0] in _PATH_SEPARATORS:
             file_path = file_path[1:]
-        full_file_path = os.path.join(self.spec.src_dir_path,
-                                      file_path)
-        lines = list()
-        try:
-            line_num = 0
-            with open(full_file_path, encoding='utf-8') as f:
-                for line in f:
-                    line_num += 1
-                    line = line.rstrip('\r\n\0')
-                    if line_num >= first_line_number and \
-                            line_num <= last_line_number:
-                        lines.append(LineInfo(line_num, line))
-                    if line_num >= last_line_number:
-                        break
-        except OSError as e:
-            if self.__check_debug(5):
-                traceback.print_exc()
-                print('debug: exception reading file: {}'.format(e))
+        # linecache searches sys.path for relative paths
+        full_file_path = os.path.abspath(os.path.join(self.spec.src_dir_path,
+                                                      file_path))
+        all_lines = linecache.getlines(full_file_path)
+        if not all_lines:
             if global_config.verbosity >= Verbosity.NORMAL:
                 print('info: failed to read source file for lib {}: {}'.format(\
-                    self.spec.lib_name, e))
-
-        return lines
+                    self.spec.lib_name, full_file_path))
+        return _get_line_infos(all_lines, first_line_number, last_line_number)
 
     # Get a list of file specifiers (e.g., libname:/libsource/prog.brs)
     # for the regular files (not dirs) in the library, never None
@@ -156,6 +145,7 @@ class SourceCodeInspector(object):
             for spec in lib_src_specs:
                 self.__libs[spec.lib_name] = _LibrarySource(spec)
         self.__is_verified = False
+        self.__zip_lines = dict()       # file path in zip -> list of str
         if self.__check_debug(2):
             print('debug: SourceCodeInpector({})'.format(channelZipPath))
 
@@ -259,20 +249,21 @@ class SourceCodeInspector(object):
             last_line_number):
         while len(file_path) and file_path[0] in _PATH_SEPARATORS:
             file_path = file_path[1:]
-        lines = list()
+        all_lines = self.__zip_lines.get(file_path, None)
+        if all_lines is None:
+            all_lines = self.__read_all_lines_from_zip(file_path)
+            self.__zip_lines[file_path] = all_lines
+        return _get_line_infos(all_lines, first_line_number, last_line_number)
+
+    # Reads an entire file from the channel zip
+    # @return list of str lines, with line endings, may be empty
+    def __read_all_lines_from_zip(self, file_path):
+        all_lines = list()
         try:
             with zipfile.ZipFile(self.__channel_zip_path) as zip:
                 with zip.open(file_path) as fd:
-                    line_number = 1
-                    line = fd.readline()
-                    while line:
-                        if line_number >= first_line_number:
-                            line = str(line, encoding='utf-8').rstrip('\r\n\0')
-                            lines.append(LineInfo(line_number, line))
-                        if line_number >= last_line_number:
-                            break
-                        line = fd.readline()
-                        line_number += 1
+                    for line in fd:
+                        all_lines.append(str(line, encoding='utf-8'))
 
         except zipfile.BadZipFile as e:
             do_exit(1, 'bad zip file: {}'.format(e))
@@ -282,12 +273,7 @@ class SourceCodeInspector(object):
                 print('debug: exception, {}'.format(e))
                 print('debug: file not found in zip: {} {}'.format(
                     self.__channel_zip_path, file_path))
-
-        if lines and not len(lines):
-            # never return empty list, return None instead
-            lines = None
-
-        return lines
+        return all_lines
 
     # return all known source files, as pkg:/... and <libname>:/...
     # specifiers, sorted alphabetically
@@ -325,5 +311,17 @@ class LineInfo(object):
         return 'LineInfo[{},{}]'.format(self.line_number, self.text)
 
 
-def do_exit(err_code, msg=None):
-    sys.modules['__main__'].global_config.do_exit(err_code, msg)
+# Get lines [first_line_number, last_line_number] inclusive, 1-based,
+# with CR/LF/NUL stripped
+# @param all_lines list of str, all lines in a file
+# @return list of LineInfo, or None if no lines are in the range
+def _get_line_infos(all_lines, first_line_number, last_line_number):
+    first_index = max(first_line_number, 1) - 1
+    lines = list()
+    for line_number, line in enumerate(
+            all_lines[first_index:last_line_number], first_index + 1):
+        lines.append(LineInfo(line_number, line.rstrip('\r\n\0')))
+    if not len(lines):
+        # never return empty list, return None instead
+        lines = None
+    return lines
@@ -0,0 +1,176 @@
+########################################################################
+# Copyright 2019-2022 Roku, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+########################################################################
+# File: StreamReader.py
+# Requires python v3.5.3 or later
+#
+# NAMING CONVENTIONS:
+#
+# Type identifiers are CamelCase
+# all_other identifiers are snake_case
+# _protected members begin with a single underscore '_' (friends can access)
+# __private members begin with double underscore: '__'
+#
+# python more or less enfores the double-underscore as private
+# by prepending the class name to those identifiers. That makes
+# it difficult (but not impossible) for other classes to access
+# those identifiers.
+
+import struct
+
+# Initial size of the receive buffer. Most messages fit, so a whole stack
+# trace or variable listing is usually decoded from a single recv.
+# The buffer grows if a single value does not fit.
+_RECV_BUFFER_SIZE = 8192
+
+# Compiled once, rather than parsing a format string on every read
+_INT32_LE = struct.Struct('<i')
+_UINT32_LE = struct.Struct('<I')
+_INT32_UINT8_LE = struct.Struct('<iB')
+_INT64_LE = struct.Struct('<q')
+_IEEE754BINARY32_LE = struct.Struct('<f')
+_IEEE754BINARY64_LE = struct.Struct('<d')
+_UINT32S_LE = {}    # count -> Struct, see read_uint32s_le()
+
+# Reads the protocol's little-endian values from a socket, through a
+# buffer. StreamUtils reads each value with its own recv(), this reads
+# as much as the socket has available into a preallocated buffer and
+# decodes values in place.
+# Not thread-safe: a socket must have exactly one reader.
+# Each read_*() takes a counter whose byte_read_count is incremented by
+# the number of bytes consumed, or None.
+class StreamReader(object):
+
+    def __init__(self, sock):
+        self.__sock = sock
+        self.__buf = bytearray(_RECV_BUFFER_SIZE)
+        self.__view = memoryview(self.__buf)    # recv_into() target
+        self.__pos = 0          # index of the next unread byte in __buf
+        self.__end = 0          # index after the last received byte
+
+    # @raise EOFError on EOF
+    # @return bytes of length num_bytes
+    def read_bytes(self, num_bytes, counter):
+        pos = self.__consume(num_bytes, counter)
+        return bytes(self.__view[pos:pos + num_bytes])
+
+    # @raise EOFError on EOF
+    def read_uint8(self, counter):
+        return self.__buf[self.__consume(1, counter)]
+
+    # @raise EOFError on EOF
+    def read_int32_le(self, counter):
+        return _INT32_LE.unpack_from(self.__buf,
+                                     self.__consume(4, counter))[0]
+
+    # @raise EOFError on EOF
+    def read_uint32_le(self, counter):
+        return _UINT32_LE.unpack_from(self.__buf,
+                                      self.__consume(4, counter))[0]
+
+    # @raise EOFError on EOF
+    # @return tuple of count uint32 values
+    def read_uint32s_le(self, count, counter):
+        uint32s = _UINT32S_LE.get(count)
+        if not uint32s:
+            uint32s = struct.Struct('<{}I'.format(count))
+            _UINT32S_LE[count] = uint32s
+        return uint32s.unpack_from(self.__buf,
+                                   self.__consume(4 * count, counter))
+
+    # A 32-bit signed int immediately followed by an unsigned byte
+    # @raise EOFError on EOF
+    # @return tuple (int32, uint8)
+    def read_int32_uint8_le(self, counter):
+        return _INT32_UINT8_LE.unpack_from(self.__buf,
+                                           self.__consume(5, counter))
+
+    # @raise EOFError on EOF
+    def read_int64_le(self, counter):
+        return _INT64_LE.unpack_from(self.__buf,
+                                     self.__consume(8, counter))[0]
+
+    # @raise EOFError on EOF
+    def read_ieee754binary32_le(self, counter):
+        return _IEEE754BINARY32_LE.unpack_from(self.__buf,
+                                               self.__consume(4, counter))[0]
+
+    # @raise EOFError on EOF
+    def read_ieee754binary64_le(self, counter):
+        return _IEEE754BINARY64_LE.unpack_from(self.__buf,
+                                               self.__consume(8, counter))[0]
+
+    # Read a NUL-terminated UTF-8 string
+    # @raise EOFError on EOF
+    def read_utf8(self, counter):
+        start = self.__pos
+        end = self.__buf.find(b'\0', start, self.__end)
+        while end < 0:
+            # Not terminated within the buffer: read more, and search
+            # only the bytes that have not been searched yet
+            searched = self.__end - start
+            self.__fill(searched + 1)
+            start = 0
+            end = self.__buf.find(b'\0', searched, self.__end)
+        s = str(self.__view[start:end], encoding='utf-8')
+        self.__pos = end + 1
+        if counter:
+            counter.byte_read_count += end + 1 - start
+        return s
+
+    # Mark num_bytes as read, receiving them first if needed
+    # @raise EOFError on EOF
+    # @return index of the first of the num_bytes bytes in __buf
+    def __consume(self, num_bytes, counter):
+        pos = self.__pos
+        if pos + num_bytes > self.__end:
+            self.__fill(num_bytes)
+            pos = 0
+        self.__pos = pos + num_bytes
+        if counter:
+            counter.byte_read_count += num_bytes
+        return pos
+
+    # Move the unread bytes to the start of the buffer, and receive until
+    # at least num_bytes are buffered. Upon return, __pos is 0.
+    # @raise EOFError on EOF
+    def __fill(self, num_bytes):
+        buf = self.__buf
+        unread = self.__end - self.__pos
+        if num_bytes > len(buf):
+            # A bytearray cannot be resized while a memoryview of it
+            # exists, so replace both
+            old_buf = buf
+            buf = bytearray(max(num_bytes, 2 * len(old_buf)))
+            buf[:unread] = old_buf[self.__pos:self.__end]
+            self.__view.release()
+            self.__buf = buf
+            self.__view = memoryview(buf)
+        elif self.__pos:
+            buf[:unread] = buf[self.__pos:self.__end]
+        self.__pos = 0
+        self.__end = unread
+        view = self.__view
+        while self.__end < num_bytes:
+            count = self.__sock.recv_into(view[self.__end:])
+            if not count:
+                received = self.__end
+                self.__end = 0
+                if received:
+                    raise OSError(
+                        'bad read, expected num_bytes={},actual={}'.format(
+                            num_bytes, received))
+                raise EOFError()
+            self.__end += count
@@ -88,6 +88,7 @@ class Test(abc.ABC):
             raise ValueError('test_mgr required but not supplied')
         self._test_mgr = test_mgr
         self._protocol_version = None   # actual protocol test is running against
+        self._has_bad_line_number_bug = False   # set in start()
 
         # Private attributes
         self.__debug_level = 0
@@ -131,6 +132,8 @@ class Test(abc.ABC):
             assert debugger_client
             assert debugger_client.get_protocol_version()
         self._protocol_version = debugger_client.get_protocol_version()
+        self._has_bad_line_number_bug = debugger_client.has_feature(
+                            ProtocolFeature.BAD_LINE_NUMBER_IN_STACKTRACE_BUG)
         return True
 
     # If a string (not None) is returned, the command is executed as a
@@ -264,8 +267,7 @@ class Test(abc.ABC):
         elif request and request.cmd_code == CmdCode.STACKTRACE:
             stack_frame = update.frames[-1]
             # Ignore line_num in versions that are known to have incorrect ones
-            line_ok = self._protocol_version.has_feature(
-                            ProtocolFeature.BAD_LINE_NUMBER_IN_STACKTRACE_BUG) or \
+            line_ok = self._has_bad_line_number_bug or \
                         self.__check_attr(stack_frame, 'line_num',
                             expected_src_file_line_num, annotation)
             if line_ok and self.__check_attr(stack_frame, 'file_path', expected_src_file_uri,